@@ -5,6 +5,7 @@ EventMainActuator.py
 """
 
 import asyncio
+import sys
 from typing import AsyncGenerator, Any, Awaitable, Callable, Generator, Union, Dict, Tuple, Set, cast
 
 # 导出语句
@@ -13,12 +14,18 @@ __all__ = ['Actuator', 'Event', "get_actuator"]  # 明确导出类
 # ================= 核心类 =================
 # 定义事件数据类，用于封装事件信息
 class Event:
-    """表示一个待执行的操作事件"""
+    """表示一个待执行的操作事件（使用__slots__，不为每个实例创建__dict__）"""
+
+    __slots__ = ('type', 'data')
 
     def __init__(self, event_type: str, data: Any):
-        self.type = event_type  # 事件类型，对应注册的命令名
+        # 事件类型，对应注册的命令名（驻留字符串 相同类型的事件共享同一个对象）
+        self.type = sys.intern(event_type) if type(event_type) is str else event_type
         self.data = data  # 事件携带的数据，传递给命令函数
 
+    def __repr__(self):
+        return f"Event({self.type!r}, {self.data!r})"
+
 
 class Actuator:  # 只负责执行，不关心事件来源
     """事件操作执行器（核心类）"""
@@ -3,10 +3,17 @@ MyScripActuator 包入口文件
 初始化时自动注册内置命令
 """
 
-from .core import Actuator, Event, get_actuator, _actuator_instance
+from .core import Actuator, Event, DispatchStats, default_channel_key, get_actuator, _actuator_instance
+from .schema import PayloadSchema, ScriptValidationError, CompiledScript, NUMBER
+from .multiplexer import EventMultiplexer
+from .sharding import ShardedActuator
+from .replay import ReplayScheduler, ReplayStats
+from .journal import EventJournal, JournaledEvent
 from .commands import basic  # 导入即完成注册
 
-__all__ = ['Actuator', 'Event', 'get_actuator', 'commands']
+__all__ = ['Actuator', 'Event', 'DispatchStats', 'default_channel_key', 'get_actuator', 'commands',
+           'PayloadSchema', 'ScriptValidationError', 'CompiledScript', 'NUMBER', 'EventMultiplexer',
+           'ShardedActuator', 'ReplayScheduler', 'ReplayStats', 'EventJournal', 'JournaledEvent']
 __version__ = '0.2.0'
 
 # 初始化时自动注册的验证
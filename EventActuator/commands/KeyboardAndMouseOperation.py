@@ -1,40 +1,81 @@
 """
 KeyboardAndMouseOperation.py
 键鼠操作的命令的注册
+（pyautogui调用均在单线程执行器中运行，不阻塞事件循环，且保持系统输入顺序）
 """
 
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 # from typing import Callable, Awaitable, Any
-import pyautogui
+try:
+    import pyautogui
+except ImportError:  # 无图形环境时可通过set_backend注入替身
+    pyautogui = None
 
-from EventActuator import get_actuator
+from EventActuator import get_actuator, PayloadSchema, NUMBER
 _actuator_instance = get_actuator()
 
+_POINT = {"x": NUMBER, "y": NUMBER}  # 坐标参数结构
+
+# ================= 输入执行器 =================
+_input_backend = pyautogui  # 实际执行键鼠操作的后端（默认pyautogui）
+_input_executor = None  # 单线程执行器 保证操作按提交顺序执行
+
+
+def set_backend(backend):
+    """替换键鼠操作后端（例如测试时传入记录调用的替身对象）"""
+    global _input_backend
+    _input_backend = backend
+
+
+def get_input_executor() -> ThreadPoolExecutor:
+    """获取（必要时创建）键鼠操作专用的单线程执行器"""
+    global _input_executor
+    if _input_executor is None:
+        _input_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="input")
+    return _input_executor
+
+
+def shutdown_input_executor(wait: bool = True):
+    """关闭执行器（再次调用命令时会自动重建）"""
+    global _input_executor
+    if _input_executor is not None:
+        _input_executor.shutdown(wait=wait)
+        _input_executor = None
+
+
+async def run_input(func_name: str, *args, **kwargs):
+    """在执行器线程中调用后端函数，事件循环在等待期间保持空闲"""
+    if _input_backend is None:
+        raise RuntimeError("pyautogui未安装，请先安装或通过set_backend设置后端")
+    func = getattr(_input_backend, func_name)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_input_executor(), partial(func, *args, **kwargs))
+
 
 # ================= 创建命令 =================
 def register_commands():
     """注册所有命令到全局执行器实例"""
 
-    @_actuator_instance.register("click")
+    @_actuator_instance.register("click", schema=_POINT)  # 坐标参数由schema检查
     async def handle_click(data: dict):
-        # 添加坐标参数检查
-        if "x" not in data or "y" not in data:
-            raise ValueError("缺少坐标参数")
-        pyautogui.click(data["x"], data["y"])
+        await run_input("click", data["x"], data["y"])
         print(f"在 ({data['x']}, {data['y']}) 执行点击")
 
-    @_actuator_instance.register("input")
+    @_actuator_instance.register("input", schema=PayloadSchema(payload_type=str))
     async def handle_input(data: str):
-        pyautogui.typewrite(data)
+        await run_input("typewrite", data)
         print(f"输入文本: {data}")
 
-    @_actuator_instance.register("mouse_move_abs")
+    @_actuator_instance.register("mouse_move_abs", schema=_POINT)
     async def mouse_move_abs(data: dict):  # 移除 self 参数
         x, y = data["x"], data["y"]
-        pyautogui.moveTo(x, y)
+        await run_input("moveTo", x, y)
         print(f"移动到绝对坐标 ({x}, {y})")
 
-    @_actuator_instance.register("mouse_move")
+    @_actuator_instance.register("mouse_move", schema=_POINT)
     async def _mouse_move(data):
         """
         鼠标移动命令处理函数
@@ -42,20 +83,20 @@ def register_commands():
         """
         x = data["x"]
         y = data["y"]
-        pyautogui.moveTo(x, y)
+        await run_input("moveTo", x, y)
         print(f"鼠标已移动到 ({x}, {y})")
 
     @_actuator_instance.register("mouse_click")
     async def _mouse_click(_):
         """执行鼠标点击（不需要参数）"""
-        pyautogui.click()
+        await run_input("click")
         print("已执行鼠标点击")
 
-    @_actuator_instance.register("keyboard_input")
+    @_actuator_instance.register("keyboard_input", schema={"text": str})
     async def _keyboard_input(data):
         """键盘输入文本"""
         text = data["text"]
-        pyautogui.typewrite(text)
+        await run_input("typewrite", text)
         print(f"已输入文本：{text}")
 
-    # 可继续添加更多命令...
\ No newline at end of file
+    # 可继续添加更多命令...
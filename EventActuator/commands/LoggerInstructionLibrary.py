@@ -6,14 +6,404 @@ LoggerInstructionLibrary.py
 # from typing import Callable, Awaitable, Any
 import os
 import asyncio
+import bz2
+import gzip
+import lzma
+import shutil
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 
-from EventActuator import get_actuator
+from EventActuator import get_actuator, PayloadSchema, NUMBER
 # from EventActuator import Event
-from FilesIO import generate_log_header
+from FilesIO import generate_log_header, name_file
 
 _actuator_instance = get_actuator()  # 执行器实例
-open_log_files = {}  # 全局文件跟踪字典 {path: {"file": file_obj, "hook": hook_func}}
+open_log_files = {}  # 全局文件跟踪字典 {path: {"hook": hook_func, "writer": LogWriteBuffer}}（文件句柄由log_file_pool管理）
+
+DEFAULT_MAX_OPEN_LOG_FILES = 64  # 同时保持打开的日志文件句柄上限
+
+# 写入策略的默认配置（log_open时可通过同名参数逐个文件覆盖）
+log_write_config = {
+    "durability": "batched",  # flush_each: 每行立即写入并刷新 / batched: 缓冲后批量写入
+    "max_buffer_bytes": 64 * 1024,  # 缓冲达到该大小时立即刷新
+    "flush_interval": 0.5,  # 缓冲中的内容最多停留的秒数
+    "fsync_on_close": False,  # 关闭文件前是否fsync到磁盘
+}
+
+
+def configure_log_writer(**options):
+    """修改默认写入策略（只影响之后打开的文件）"""
+    unknown = set(options) - set(log_write_config)
+    if unknown:
+        raise KeyError(f"未知的写入配置项: {', '.join(sorted(unknown))}")
+    if options.get("durability", "batched") not in ("flush_each", "batched"):
+        raise ValueError("durability must be 'flush_each' or 'batched'")
+    log_write_config.update(options)
+
+
+# 日志轮转的默认配置（log_open时可通过同名参数逐个文件覆盖）
+log_rotate_config = {
+    "rotate_bytes": 0,  # 写入某一行会超过该字节数时先轮转（0表示不按大小轮转；单行超过上限时独占一个文件）
+    "rotate_interval": 0,  # 距离打开或上次轮转超过该秒数后轮转（0表示不按时间轮转）
+    "rotate_format": "%Y%m%d-%H%M%S",  # 轮转文件名中的日期格式（通过name_file生成）
+    "compress": "gzip",  # 轮转后的压缩方式 gzip / bz2 / xz / none
+}
+
+_COMPRESSORS = {"gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+
+log_hook_registry = None  # 触发post_rotate等钩子的HookRegistry（通过set_log_hook_registry设置）
+
+
+def configure_log_rotation(**options):
+    """修改默认轮转策略（只影响之后打开的文件）"""
+    unknown = set(options) - set(log_rotate_config)
+    if unknown:
+        raise KeyError(f"未知的轮转配置项: {', '.join(sorted(unknown))}")
+    if options.get("compress", "none") not in ("none", *_COMPRESSORS):
+        raise ValueError(f"compress must be one of none, {', '.join(_COMPRESSORS)}")
+    log_rotate_config.update(options)
+
+
+def set_log_hook_registry(registry):
+    """设置日志钩子注册表，每次轮转（含压缩）完成后触发 registry.trigger('post_rotate', context)"""
+    global log_hook_registry
+    log_hook_registry = registry
+
+
+# ================= 日志轮转 =================
+class LogRotation:
+    """单个日志文件的轮转策略（由句柄池在写入线程中检查和执行）"""
+
+    def __init__(self, rotate_bytes: int = 0, rotate_interval: float = 0,
+                 rotate_format: str = "%Y%m%d-%H%M%S", compress: str = "gzip"):
+        if compress not in ("none", *_COMPRESSORS):
+            raise ValueError(f"compress must be one of none, {', '.join(_COMPRESSORS)}")
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.rotate_format = rotate_format
+        self.compress = compress
+        self.opened_at = time.monotonic()
+        self.base_size = 0  # 打开或轮转后（写入头部之后）文件的字节数
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rotate_bytes or self.rotate_interval)
+
+    def due(self, size: int) -> str:
+        """返回轮转原因（size / time），不需要轮转时返回空字符串"""
+        if self.rotate_bytes and size >= self.rotate_bytes:
+            return "size"
+        if self.rotate_interval and time.monotonic() - self.opened_at >= self.rotate_interval:
+            return "time"
+        return ""
+
+    def target_path(self, path: str) -> str:
+        """生成轮转后的文件名：<原文件名>.<日期><后缀>，重名时追加序号"""
+        directory, base = os.path.split(path)
+        stem, suffix = os.path.splitext(base)
+        stamp = name_file("date", file_name=self.rotate_format)
+        extension = _COMPRESSORS[self.compress][1] if self.compress in _COMPRESSORS else ""
+        target = os.path.join(directory, f"{stem}.{stamp}{suffix}")
+        counter = 1
+        while os.path.exists(target) or (extension and os.path.exists(target + extension)):
+            target = os.path.join(directory, f"{stem}.{stamp}-{counter}{suffix}")
+            counter += 1
+        return target
+
+
+_compress_executor = None  # 压缩线程 与写入线程分开，压缩不会推迟日志写入
+
+
+def _compress_file(path: str, method: str) -> str:
+    """压缩轮转后的文件并删除原文件，返回压缩文件路径"""
+    opener, extension = _COMPRESSORS[method]
+    target = path + extension
+    with open(path, "rb") as src, opener(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+    return target
+
+
+async def _finish_rotation(info: dict):
+    """后台完成一次轮转：压缩文件后触发post_rotate钩子"""
+    global _compress_executor
+    method = info["compress"]
+    if method in _COMPRESSORS:
+        if _compress_executor is None:
+            _compress_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+        loop = asyncio.get_running_loop()
+        try:
+            info["rotated_path"] = await loop.run_in_executor(
+                _compress_executor, _compress_file, info["rotated_path"], method)
+        except OSError as e:
+            print(f"[Error] [Logger] 压缩失败 {info['rotated_path']}: {str(e)}")
+            info["compress"] = "none"
+    if log_hook_registry is not None:
+        try:
+            await log_hook_registry.trigger("post_rotate", info)
+        except Exception as e:  # 钩子出错不影响日志文件本身的关闭流程
+            print(f"[Error] [Logger] post_rotate钩子执行失败 {info['path']}: {str(e)}")
+
+
+# ================= 文件句柄池 =================
+class LogFilePool:
+    """日志文件句柄池
+
+    - 所有文件操作都在同一个写入线程中执行，不阻塞事件循环，且同一文件的写入保持提交顺序
+    - 最多同时打开max_open个句柄，超出时关闭最久未使用的文件；之后再写入时自动以追加模式重新打开
+    - 句柄字典只在写入线程中访问，不需要加锁
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN_LOG_FILES):
+        self.max_open = max_open
+        self._handles = OrderedDict()  # 路径 → 文件对象（按最近使用排序）
+        self._rotations = {}  # 路径 → LogRotation（只记录启用了轮转的文件）
+        self._executor = None  # 写入线程（首次使用时创建）
+        self.opens = 0  # log_open打开的次数
+        self.reopens = 0  # 被淘汰后重新打开的次数
+        self.evictions = 0  # 因达到上限被关闭的次数
+        self.rotations = 0  # 轮转次数
+
+    @property
+    def open_count(self) -> int:
+        """当前打开的句柄数"""
+        return len(self._handles)
+
+    def snapshot(self) -> dict:
+        """返回句柄池统计"""
+        return {"open": self.open_count, "max_open": self.max_open, "opens": self.opens,
+                "reopens": self.reopens, "evictions": self.evictions, "rotations": self.rotations}
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-writer")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    # 以下方法在写入线程中执行
+    def _acquire(self, path: str, mode: str = "a"):
+        """获取句柄（不存在时打开，必要时先淘汰最久未使用的句柄）"""
+        handle = self._handles.get(path)
+        if handle is not None:
+            self._handles.move_to_end(path)
+            return handle
+        while self._handles and len(self._handles) >= max(1, self.max_open):
+            _, evicted = self._handles.popitem(last=False)
+            evicted.close()
+            self.evictions += 1
+        handle = open(path, mode, encoding="utf-8")
+        self._handles[path] = handle
+        return handle
+
+    def _open(self, path: str, mode: str, rotation: "LogRotation" = None):
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        previous = self._handles.pop(path, None)
+        if previous is not None:
+            previous.close()
+        if rotation is not None and rotation.enabled:
+            self._rotations[path] = rotation
+        else:
+            self._rotations.pop(path, None)
+        handle = self._acquire(path, mode)
+        self.opens += 1
+        self._write_header(path, handle)
+        if rotation is not None:
+            rotation.base_size = os.fstat(handle.fileno()).st_size
+
+    @staticmethod
+    def _write_header(path: str, handle):
+        # 头部需要文件已经存在才能生成 所以在打开之后生成，并通过同一个句柄写入
+        header = "".join(str(chunk) for chunk in generate_log_header(path))
+        if header:
+            handle.write(header)
+            handle.flush()
+
+    def _write(self, path: str, text: str) -> list:
+        if path not in self._handles:
+            self.reopens += 1
+        handle = self._acquire(path)
+        rotation = self._rotations.get(path)
+        if rotation is None:
+            handle.write(text)
+            handle.flush()
+            return []
+
+        rotated = []
+        if rotation.rotate_bytes:
+            # 按行拆分批次：写入某一行会超过rotate_bytes时先轮转（批量写入也不会超出上限）
+            size = os.fstat(handle.fileno()).st_size  # 每次写入后都已flush 与文件大小一致
+            start = pos = pending = 0
+            for line in text.splitlines(keepends=True):
+                length = len(line.encode("utf-8"))
+                if size + pending + length > rotation.rotate_bytes and size + pending > rotation.base_size:
+                    handle.write(text[start:pos])
+                    handle.flush()
+                    rotated.append(self._rotate(path, rotation, "size"))
+                    handle = self._handles[path]
+                    size, pending, start = rotation.base_size, 0, pos
+                pending += length
+                pos += len(line)
+            text = text[start:]
+        handle.write(text)
+        handle.flush()
+        reason = rotation.due(os.fstat(handle.fileno()).st_size)
+        if reason:
+            rotated.append(self._rotate(path, rotation, reason))
+        return rotated
+
+    def _rotate(self, path: str, rotation: "LogRotation", reason: str) -> dict:
+        """关闭并重命名当前文件，然后打开新文件继续写入（压缩由调用方在后台进行）"""
+        handle = self._handles.pop(path)
+        size = os.fstat(handle.fileno()).st_size
+        handle.close()
+        target = rotation.target_path(path)
+        os.replace(path, target)
+        rotation.opened_at = time.monotonic()
+        self.rotations += 1
+        handle = self._acquire(path)
+        self._write_header(path, handle)
+        rotation.base_size = os.fstat(handle.fileno()).st_size
+        return {"path": path, "rotated_path": target, "reason": reason, "bytes": size,
+                "compress": rotation.compress}
+
+    def _close(self, path: str, fsync: bool):
+        self._rotations.pop(path, None)
+        handle = self._handles.pop(path, None)
+        if handle is None:
+            return
+        if fsync:
+            handle.flush()
+            os.fsync(handle.fileno())
+        handle.close()
+
+    # 对外接口
+    async def open(self, path: str, mode: str = "a", rotation: "LogRotation" = None):
+        """打开文件并写入日志头部（已打开的文件会按mode重新打开）"""
+        await self._run(self._open, path, mode, rotation)
+
+    async def write(self, path: str, text: str):
+        """写入内容并刷新到系统缓冲，返回本次写入发生的轮转信息列表（没有轮转时为空）"""
+        return await self._run(self._write, path, text)
+
+    async def close(self, path: str, fsync: bool = False):
+        """关闭文件（已被淘汰的文件无需处理）"""
+        await self._run(self._close, path, fsync)
+
+    def shutdown(self, wait: bool = True):
+        """关闭写入线程（再次使用时会自动重建）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+log_file_pool = LogFilePool()  # 全局句柄池
+
+
+def configure_log_pool(max_open: int):
+    """修改同时打开的日志文件句柄上限（超出的句柄在下次打开文件时关闭）"""
+    if max_open < 1:
+        raise ValueError("max_open must be at least 1")
+    log_file_pool.max_open = max_open
+
+
+# ================= 写入缓冲 =================
+class LogWriteBuffer:
+    """单个日志文件的写入缓冲区
+
+    batched模式下write只把内容放入缓冲，由后台任务按大小或时间批量写入；
+    实际的文件操作都交给句柄池的写入线程，不阻塞事件循环
+    """
+
+    def __init__(self, path: str, pool: LogFilePool = log_file_pool, durability: str = "batched",
+                 max_buffer_bytes: int = 64 * 1024, flush_interval: float = 0.5, fsync_on_close: bool = False):
+        self.path = path
+        self.pool = pool
+        self.durability = durability
+        self.max_buffer_bytes = max_buffer_bytes
+        self.flush_interval = flush_interval
+        self.fsync_on_close = fsync_on_close
+        self._lines = []  # 待写入的内容
+        self._size = 0  # 待写入内容的字符数
+        self._wakeup = asyncio.Event()  # 缓冲已满时唤醒后台任务
+        self._lock = asyncio.Lock()  # 保证同一时间只有一次批量写入
+        self._task = None  # 后台写入任务（首次写入时启动）
+        self._closing = False  # 关闭标志 通知后台任务退出
+        self._rotation_tasks = set()  # 正在压缩/触发钩子的轮转任务
+
+    @property
+    def pending(self) -> int:
+        """缓冲中尚未写入的字符数"""
+        return self._size
+
+    async def write(self, text: str):
+        """写入一段内容（batched模式下只进入缓冲）"""
+        if self.durability == "flush_each":
+            self._on_rotated(await self.pool.write(self.path, text))
+            return
+
+        self._lines.append(text)
+        self._size += len(text)
+        if self._task is None:
+            self._task = asyncio.create_task(self._background_writer())
+        if self._size >= self.max_buffer_bytes:
+            self._wakeup.set()
+
+    async def flush(self):
+        """立即把缓冲内容写入文件"""
+        async with self._lock:
+            if not self._lines:
+                return
+            text = "".join(self._lines)
+            self._lines = []
+            self._size = 0
+            self._on_rotated(await self.pool.write(self.path, text))
+
+    def _on_rotated(self, rotated: list):
+        """轮转后在后台压缩并触发钩子，不等待其完成"""
+        for info in rotated:
+            task = asyncio.create_task(_finish_rotation(info))
+            self._rotation_tasks.add(task)
+            task.add_done_callback(self._rotation_tasks.discard)
+
+    async def close(self, tail: str = ""):
+        """停止后台任务，写完缓冲和结尾内容后关闭文件"""
+        if self._task is not None:
+            # 不直接取消任务 避免打断写入线程中正在进行的写入
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if tail:
+            self._lines.append(tail)
+            self._size += len(tail)
+        await self.flush()
+        await self.pool.close(self.path, self.fsync_on_close)
+        if self._rotation_tasks:
+            # 等待进行中的压缩完成 保证关闭后钩子都已触发（个别失败不影响关闭）
+            for result in await asyncio.gather(*self._rotation_tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    print(f"[Error] [Logger] 轮转后处理失败 {self.path}: {str(result)}")
+
+    async def _background_writer(self):
+        """后台批量写入：缓冲满或等待超时时刷新"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+async def flush_open_logs():
+    """写入所有打开文件的缓冲内容（执行器的关闭钩子）"""
+    for entry in list(open_log_files.values()):
+        await entry["writer"].flush()
 
 
 # ================= 创建命令 =================
@@ -21,7 +411,12 @@ open_log_files = {}  # 全局文件跟踪字典 {path: {"file": file_obj, "hook"
 def register_commands():
     """注册所有命令到全局执行器实例"""
 
-    @_actuator_instance.register("log_open")
+    @_actuator_instance.register("log_open", schema=PayloadSchema(
+        required={"path": str},
+        optional={"mode": str, "durability": str, "max_buffer_bytes": int,
+                  "flush_interval": NUMBER, "fsync_on_close": bool,
+                  "rotate_bytes": int, "rotate_interval": NUMBER, "rotate_format": str, "compress": str},
+    ))
     async def log_open(data: dict):
         """打开日志文件并记录句柄"""
         file_mode = data.get("mode", "a")
@@ -33,36 +428,23 @@ def register_commands():
 
         # 使用统一路径解析
         path = _resolve_path(raw_path, absolute_header)
+        str_path = str(path.resolve())  # 使用标准化绝对路径字符串作为键
 
-        if path in open_log_files:
+        if str_path in open_log_files:
             return
 
+        rotation = LogRotation(**{key: data.get(key, default) for key, default in log_rotate_config.items()})
 
-        # 创建目录（路径处理已统一）
-        dir_path = os.path.dirname(path)
-        if dir_path:  # 防止空路径报错
-            os.makedirs(dir_path, exist_ok=True)
-
-            # 打开文件并写入头部
-            with open(path, file_mode, encoding="utf-8") as file_obj:
-                # header_path 直接使用统一处理后的 path
-                header_content = ""
-                for chunk in generate_log_header(path):  # 简化逻辑，直接使用统一路径
-                    header_content += str(chunk)
-
-                file_obj.write(header_content)  # 无需额外的换行符
-                file_obj.flush()
-
-        # 保持文件打开状态（移出with块需要特殊处理）
-        open_file = open(path, "a", encoding="utf-8")
-        str_path = str(path.resolve())  # 使用标准化绝对路径字符串作为键
+        # 在写入线程中创建目录、打开文件并写入头部（头部与之后的写入共用同一个句柄）
+        await log_file_pool.open(str_path, file_mode, rotation)
+        writer_options = {key: data.get(key, default) for key, default in log_write_config.items()}
         open_log_files[str_path] = {
-            "file": open_file,
-            "hook": hook_func
+            "hook": hook_func,
+            "writer": LogWriteBuffer(str_path, **writer_options)
         }
         print(f"[DEBUG] 已打开文件：{str_path}")  # 调试输出
 
-    @_actuator_instance.register("log_close")
+    @_actuator_instance.register("log_close", schema=PayloadSchema(optional={"path": str}, allow_none=True))
     async def log_close(data: dict):
         """关闭日志文件并执行钩子
         参数：
@@ -78,36 +460,28 @@ def register_commands():
         end_marker = data.get("end_marker",
                               getattr(_actuator_instance, "end_msg", "\n=== Log Session Ended ===\n"))
 
-        def _close_file(file_obj):
-            """实际关闭文件的内部函数"""
-            if end_marker:
-                file_obj.write(f"\nend:{repr(end_marker)}\n")
-                file_obj.flush()
-            file_obj.close()
-
-        if resolved_path:
-            # 使用字符串形式的标准路径进行匹配
-            str_path = str(resolved_path)
-            if str_path in open_log_files:
-                entry = open_log_files.pop(str_path)
-                _close_file(entry["file"])
+        async def _close_file(entry: dict):
+            """实际关闭文件的内部函数（先写完缓冲中的内容，关闭出错时同样执行钩子）"""
+            try:
+                await entry["writer"].close(f"\nend:{repr(end_marker)}\n" if end_marker else "")
+            finally:
                 if entry["hook"]:
                     if asyncio.iscoroutinefunction(entry["hook"]):
                         await entry["hook"]()
                     else:
                         entry["hook"]()
+
+        if resolved_path:
+            # 使用字符串形式的标准路径进行匹配
+            str_path = str(resolved_path)
+            if str_path in open_log_files:
+                await _close_file(open_log_files.pop(str_path))
         else:
             # 关闭所有文件时直接使用现有路径格式
             for path in list(open_log_files.keys()):
-                entry = open_log_files.pop(path)
-                _close_file(entry["file"])
-                if entry["hook"]:
-                    if asyncio.iscoroutinefunction(entry["hook"]):
-                        await entry["hook"]()
-                    else:
-                        entry["hook"]()
+                await _close_file(open_log_files.pop(path))
 
-    @_actuator_instance.register("log_write")
+    @_actuator_instance.register("log_write", schema={"path": str, "content": None})
     async def log_writer(data: dict):
         """写入日志内容"""
         absolute_header = data.get("absolute_path", True)
@@ -119,14 +493,33 @@ def register_commands():
 
         if str_path in open_log_files:
             entry = open_log_files[str_path]
-            file_obj = entry["file"]
-            file_obj.write(f"{data['content']}\n")
-            file_obj.flush()
+            await entry["writer"].write(f"{data['content']}\n")
             if data.get("terminal_output", False):
                 print(f"[Event] [Logger] 日志写入:{repr(data['content'])}")
         elif data.get("terminal_output", False):
             print(f"[Error] [Logger] 文件未打开:{str_path}")
 
+    @_actuator_instance.register("log_flush", schema=PayloadSchema(optional={"path": str}, allow_none=True))
+    async def log_flush(data: dict):
+        """立即写入缓冲中的日志内容
+        参数：
+        - path: 可选，指定刷新的文件路径（不指定时刷新所有打开的文件）
+        - absolute_path: 是否使用绝对路径定位文件（需与log_open时一致）
+        """
+        data = data or {}
+        target_path = data.get("path", "")
+        if target_path:
+            str_path = str(_resolve_path(target_path, data.get("absolute_path", True)))
+            entries = [open_log_files[str_path]] if str_path in open_log_files else []
+        else:
+            entries = list(open_log_files.values())
+
+        for entry in entries:
+            await entry["writer"].flush()
+
+    # 主循环结束时（exit命令、脚本读完或出错）写完所有缓冲 文件保持打开 与逐条写入时的行为一致
+    _actuator_instance.add_shutdown_hook(flush_open_logs)
+
     # # 示例
     # @_actuator_instance.register("test")
     # async def test(_):
@@ -6,6 +6,7 @@ from ctypes import cast
 from typing import Dict
 
 from EventActuator.core import get_actuator
+from EventActuator.schema import PayloadSchema, NUMBER
 import asyncio
 
 __version__ = 0.0  # 这个库估计并不会更新版本 但是导入的时候没事情干
@@ -18,11 +19,12 @@ def basic_command_version(printing=True):
 
 # ================= 内置命令 =================
 # 通过装饰器注册内置命令
-@_actuator_instance.register("sleep")
+@_actuator_instance.register("sleep", schema=PayloadSchema(optional={"duration": NUMBER, "sleep": NUMBER}))
 async def _sleep(data):  # 移除self参数
-    """正确参数签名：只接收data"""
-    await asyncio.sleep(data["sleep"])  # 使用异步sleep
-    print(f"已休眠 {data['duration']} 秒")
+    """正确参数签名：只接收data（脚本中使用duration，兼容旧的sleep字段）"""
+    duration = data.get("duration", data.get("sleep", 0))
+    await asyncio.sleep(duration)  # 使用异步sleep
+    print(f"已休眠 {duration} 秒")
 
 @_actuator_instance.register("exit")
 async def handle_exit(data):
@@ -2,18 +2,92 @@
 EventActuator.py
 一个可通过注册命令执行事件的核心执行器
 """
-# import asyncio
-from typing import AsyncGenerator, Any, Awaitable, Callable, Generator, Union, Dict, Tuple, Set
+import asyncio
+import sys
+import time
+from typing import AsyncGenerator, Any, Awaitable, Callable, Generator, Union, Dict, Tuple, Set, Optional, Hashable, \
+    Iterable, AsyncIterable
+
+from .schema import PayloadSchema, CompiledScript, ScriptValidationError
 
 # ================= 核心类 =================
 # 定义事件数据类，用于封装事件信息
 class Event:
-    """表示一个待执行的操作事件"""
+    """表示一个待执行的操作事件（使用__slots__，不为每个实例创建__dict__）"""
+
+    __slots__ = ('type', 'data')
 
     def __init__(self, event_type: str, data: Any):
-        self.type = event_type  # 事件类型，对应注册的命令名
+        # 事件类型，对应注册的命令名（驻留字符串 相同类型的事件共享同一个对象）
+        self.type = sys.intern(event_type) if type(event_type) is str else event_type
         self.data = data  # 事件携带的数据，传递给命令函数
 
+    def __repr__(self):
+        return f"Event({self.type!r}, {self.data!r})"
+
+
+def default_channel_key(event: Event) -> Hashable:
+    """并发模式下默认的通道划分规则
+
+    - 带path参数的事件（日志命令）按path划分通道，不同文件之间并行
+    - 其余事件（键鼠、休眠等）共用"input"通道，保持脚本中的先后顺序
+    """
+    data = event.data
+    if isinstance(data, dict) and data.get("path"):
+        return data["path"]
+    return "input"
+
+
+class DispatchStats:
+    """事件分发的吞吐量与延迟统计"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """重置所有计数器"""
+        self.started_at = time.perf_counter()
+        self.dispatched = 0  # 已分发的事件数
+        self.completed = 0  # 已完成（含失败）的事件数
+        self.failed = 0  # 执行出错的事件数
+        self.unknown = 0  # 未注册命令的事件数
+        self.in_flight = 0  # 当前正在执行的任务数
+        self.max_in_flight = 0  # 同时执行任务数的峰值
+        self.total_latency = 0.0  # 从接收到完成的累计耗时
+        self.max_latency = 0.0
+
+    def on_dispatch(self):
+        self.dispatched += 1
+        self.in_flight += 1
+        if self.in_flight > self.max_in_flight:
+            self.max_in_flight = self.in_flight
+
+    def on_complete(self, received_at: float, failed: bool = False):
+        latency = time.perf_counter() - received_at
+        self.in_flight -= 1
+        self.completed += 1
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+        if failed:
+            self.failed += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """返回当前统计数据的字典副本"""
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "dispatched": self.dispatched,
+            "completed": self.completed,
+            "failed": self.failed,
+            "unknown": self.unknown,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "elapsed": elapsed,
+            "throughput": self.completed / elapsed if elapsed > 0 else 0.0,  # 事件/秒
+            "avg_latency": self.total_latency / self.completed if self.completed else 0.0,
+            "max_latency": self.max_latency,
+        }
+
 
 class Actuator:  # 只负责执行，不关心事件来源
     """事件操作执行器（核心类）"""
@@ -27,8 +101,10 @@ class Actuator:  # 只负责执行，不关心事件来源
         - end_msg: 决定结束时输出
         - _allowed_vars： 决定setting功能的无防呆白名单
         - _super_do_flag:
+        - stats: 分发吞吐量与延迟统计
         """
         self.commands: dict[str, Callable[[Any], Awaitable[None]]] = {}  # 命令注册表（字典结构）  # 类型注解
+        self.schemas: dict[str, PayloadSchema] = {}  # 命令参数结构（注册时声明，可选）
         self.generator = None  # 事件生成器（需通过bind_generator设置）
         self.running = False  # 主循环运行标志 为False时候停止主循环
         self.end_msg = "0" # 结束提示信息 保证兼容性采用字符串 实际上应使用数值
@@ -39,21 +115,108 @@ class Actuator:  # 只负责执行，不关心事件来源
             '_super_do_flag': (bool,),
             '_allowed_vars': (set,)
         }
+        self.stats = DispatchStats()  # 分发统计（每次main_loop开始时重置）
+        # 控制命令（并发模式下作为屏障：等待已分发的任务完成后在主循环内直接执行）
+        self.control_commands = {'exit'}
+        # 不带path时作用于所有文件的命令（并发模式下同样作为屏障 不与各文件通道中的写入并行）
+        self.broadcast_commands = {'log_close', 'log_flush'}
+        # 关闭钩子（主循环结束时依次执行，例如把日志缓冲写入磁盘）
+        self.shutdown_hooks: list[Callable[[], Any]] = []
 
     # ================= 核心方法 =================
-    def register(self, name: str):
+    def register(self, name: str, schema: Union[PayloadSchema, Dict[str, Any], None] = None):
         """
         命令注册装饰器（重点理解）
         用法：@actuator.register("命令名")
               def 处理函数(event)
-        功能：将函数注册到commands字典，使事件能触发对应函数
+              @actuator.register("命令名", schema={"x": NUMBER, "y": NUMBER})
+        功能：将函数注册到commands字典，使事件能触发对应函数；
+             声明schema后参数在执行前（或预编译时）统一校验，处理函数无需再检查
         """
+        schema = PayloadSchema.coerce(schema)
 
         def decorator(func: Callable[[Any], Awaitable[None]]):
             self.commands[name] = func
+            if schema is not None:
+                self.schemas[name] = schema
+            else:
+                self.schemas.pop(name, None)
             return func
         return decorator
 
+    def compile(self, events: Iterable[Any]) -> CompiledScript:
+        """
+        预编译事件脚本：一次性完成命令查找和参数校验
+        参数events：Event对象或load_events产出的字典（event_type/data）
+        返回CompiledScript，交给run_compiled执行；
+        存在未知命令或参数错误时抛出ScriptValidationError（包含全部错误），不会执行任何事件
+        """
+        steps = []
+        errors = []
+        for index, event in enumerate(events):
+            step = self._compile_event(index, event, errors)
+            if step is not None:
+                steps.append(step)
+        if errors:
+            raise ScriptValidationError(errors)
+        return CompiledScript(steps)
+
+    async def compile_async(self, source: AsyncIterable[Any]) -> CompiledScript:
+        """compile的异步版本（例如直接传入load_events(path)）"""
+        steps = []
+        errors = []
+        index = 0
+        async for event in source:
+            step = self._compile_event(index, event, errors)
+            if step is not None:
+                steps.append(step)
+            index += 1
+        if errors:
+            raise ScriptValidationError(errors)
+        return CompiledScript(steps)
+
+    def _compile_event(self, index: int, event: Any, errors: list):
+        """编译单个事件，出错时记录到errors并返回None"""
+        if isinstance(event, Event):
+            event_type, data = event.type, event.data
+        else:
+            event_type, data = event["event_type"], event["data"]
+
+        handler = self.commands.get(event_type)
+        if handler is None:
+            errors.append((index, event_type, "未注册的命令"))
+            return None
+        schema = self.schemas.get(event_type)
+        if schema is not None:
+            try:
+                data = schema.validate(data)
+            except ValueError as e:
+                errors.append((index, event_type, str(e)))
+                return None
+        return handler, data, event_type
+
+    async def run_compiled(self, script: CompiledScript):
+        """执行预编译脚本（热循环中不再查表和校验参数）"""
+        self.running = True
+        self.stats.reset()
+        stats = self.stats
+        try:
+            for handler, data, event_type in script.steps:
+                if not self.running:
+                    break  # 收到停止信号
+                received_at = time.perf_counter()
+                stats.on_dispatch()
+                try:
+                    await handler(data)
+                except Exception as e:
+                    stats.on_complete(received_at, failed=True)
+                    print(f"[Error] Error executing command {event_type}: {str(e)}")
+                else:
+                    stats.on_complete(received_at)
+        finally:
+            self.running = False
+            await self._run_shutdown_hooks()
+
     def bind_generator(self, gen: AsyncGenerator[Event, None]):
         """
         绑定事件生成器（生成器需异步生成Event对象）
@@ -66,7 +229,39 @@ class Actuator:  # 只负责执行，不关心事件来源
         """停止主循环"""
         self.running = False
 
-    async def main_loop(self):
+    def is_barrier(self, event: Event) -> bool:
+        """判断事件在并发模式下是否需要作为屏障执行"""
+        if event.type in self.control_commands:
+            return True
+        if event.type in self.broadcast_commands:
+            data = event.data
+            return not (isinstance(data, dict) and data.get("path"))
+        return False
+
+    def add_shutdown_hook(self, hook: Callable[[], Any]):
+        """
+        注册关闭钩子（同一个函数只注册一次）
+        主循环或预编译脚本结束时（包括exit命令和出错退出）依次调用，支持同步与异步函数
+        """
+        if hook not in self.shutdown_hooks:
+            self.shutdown_hooks.append(hook)
+
+    async def _run_shutdown_hooks(self):
+        """执行关闭钩子（单个钩子出错不影响其余钩子）"""
+        for hook in list(self.shutdown_hooks):
+            try:
+                result = hook()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                print(f"[Error] Error running shutdown hook {getattr(hook, '__name__', hook)}: {str(e)}")
+
+    async def main_loop(
+            self,
+            concurrency: Optional[int] = None,
+            key_func: Callable[[Event], Hashable] = default_channel_key,
+            journal=None
+    ):
         """
         启动异步主循环（事件处理核心）
         流程：
@@ -74,29 +269,134 @@ class Actuator:  # 只负责执行，不关心事件来源
         2. 循环获取生成器中的事件
         3. 查找并执行对应的命令处理函数
         4. 直到生成器结束或收到停止信号
+
+        参数：
+        - concurrency: 同时执行的处理任务上限，None时逐个顺序执行（默认）；
+                       control_commands中的命令（如exit）与不带path的broadcast_commands命令
+                       （如log_close）在并发模式下作为屏障执行
+        - key_func: 并发模式下的通道划分函数，同一通道内的事件按顺序执行，
+                    不同通道之间并行执行
+        - journal: 可选的EventJournal，带有position的事件（JournaledEvent）处理完成后记录其位置，
+                   中断后可通过journal.resume跳过已完成的事件
         """
         if not self.generator:
             raise RuntimeError("[Error] Event generator must be bound first!")  # 必须先绑定事件生成器
 
         self.running = True
+        self.stats.reset()
+        try:
+            if concurrency:
+                await self._concurrent_loop(concurrency, key_func, journal)
+            else:
+                await self._sequential_loop(journal)
+        finally:
+            self.running = False
+            await self._run_shutdown_hooks()  # 例如写完日志缓冲 再记录完成位置
+            if journal is not None:
+                await journal.flush()  # 结束时把剩余的完成记录写入磁盘
+
+    async def _sequential_loop(self, journal=None):
+        """顺序执行模式：逐个等待处理函数完成"""
+        stats = self.stats
+        # 异步迭代事件生成器
+        async for event in self.generator:  # 完全解耦
+            if not self.running:
+                break  # 收到停止信号
+
+            # 查找对应的命令处理函数
+            handler = self.commands.get(event.type)
+            if handler:
+                received_at = time.perf_counter()
+                stats.on_dispatch()
+                try:
+                    # 校验参数（声明了schema的命令）
+                    data = event.data
+                    schema = self.schemas.get(event.type)
+                    if schema is not None:
+                        data = schema.validate(data)
+                    # 执行命令，并传入事件数据
+                    await handler(data)
+                except Exception as e:
+                    stats.on_complete(received_at, failed=True)
+                    print(f"[Error] Error executing command {event.type}: {str(e)}")  # 事件执行错误处理
+                else:
+                    stats.on_complete(received_at)
+            else:
+                stats.unknown += 1
+                print(f"[Unknown] Unknown command type: {event.type}")  # 未知事件处理
+
+            # 记录已处理的事件（执行出错和未知命令同样视为已处理，续读时不再重复）
+            if journal is not None:
+                position = getattr(event, "position", None)
+                if position is not None:
+                    journal.record(*position)
+
+    async def _concurrent_loop(self, concurrency: int, key_func: Callable[[Event], Hashable], journal=None):
+        """并发执行模式：有界并发 + 通道内保序"""
+        stats = self.stats
+        slots = asyncio.Semaphore(concurrency)  # 限制同时存在的任务数 同时对生成器形成背压
+        lanes: Dict[Hashable, asyncio.Task] = {}  # 通道 → 该通道最后一个任务
+        pending: Set[asyncio.Task] = set()
+
+        async def run(event: Event, handler, schema: Optional[PayloadSchema], previous: Optional[asyncio.Task],
+                      received_at: float):
+            try:
+                if previous is not None:
+                    await asyncio.wait((previous,))  # 等待同通道的前一个事件完成（不继承其异常）
+                await handler(schema.validate(event.data) if schema is not None else event.data)
+            except Exception as e:
+                stats.on_complete(received_at, failed=True)
+                print(f"[Error] Error executing command {event.type}: {str(e)}")
+            else:
+                stats.on_complete(received_at)
+            finally:
+                slots.release()
+            # 被取消的任务不记录（没有执行完成）
+            if journal is not None:
+                position = getattr(event, "position", None)
+                if position is not None:
+                    journal.record(*position)
+
+        def forget(task: asyncio.Task, key: Hashable):
+            pending.discard(task)
+            if lanes.get(key) is task:
+                del lanes[key]  # 通道空闲后释放 避免键无限增长
+
         try:
-            # 异步迭代事件生成器
-            async for event in self.generator:  # 完全解耦
+            async for event in self.generator:
                 if not self.running:
                     break  # 收到停止信号
 
-                # 查找对应的命令处理函数
                 handler = self.commands.get(event.type)
-                if handler:
-                    try:
-                        # 执行命令，并传入事件数据
-                        await handler(event.data)
-                    except Exception as e:
-                        print(f"[Error] Error executing command {event.type}: {str(e)}")  # 事件执行错误处理
-                else:
-                    print(f"[Unknown] Unknown command type: {event.type}")  # 未知事件处理
+                if not handler:
+                    stats.unknown += 1
+                    print(f"[Unknown] Unknown command type: {event.type}")
+                    if journal is not None and getattr(event, "position", None) is not None:
+                        journal.record(*event.position)
+                    continue
+
+                received_at = time.perf_counter()
+                if self.is_barrier(event):
+                    # 屏障：之前的事件全部完成后再执行控制命令，执行后由循环开头重新检查运行状态
+                    if pending:
+                        await asyncio.gather(*pending, return_exceptions=True)
+                    await slots.acquire()
+                    stats.on_dispatch()
+                    await run(event, handler, self.schemas.get(event.type), None, received_at)
+                    continue
+
+                await slots.acquire()
+                key = key_func(event)
+                stats.on_dispatch()
+                task = asyncio.create_task(run(event, handler, self.schemas.get(event.type), lanes.get(key),
+                                               received_at))
+                lanes[key] = task
+                pending.add(task)
+                task.add_done_callback(lambda t, k=key: forget(t, k))
         finally:
-            self.running = False
+            # 等待已分发的任务全部完成
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
     # ================= 额外方法 =================
 
@@ -0,0 +1,199 @@
+"""
+journal.py
+预写日志：记录已执行完成的事件在脚本中的位置，进程中断后可跳过已完成的事件继续执行
+
+用法：
+    journal = EventJournal("saves/test/test.journal")
+    actuator.bind_generator(journal.resume("saves/test/test.json"))
+    await actuator.main_loop(journal=journal)
+    await journal.close()
+
+文件格式（JSON Lines）：
+    第一行   {"script": 脚本绝对路径}
+    之后每行 [序号, 事件结束处的字节偏移]
+
+- 记录先进入缓冲，按数量（group_size）或时间（group_interval）成组写入并fsync，
+  一次fsync覆盖多条记录；fsync在线程中执行，不阻塞事件循环
+- 中断时最多有最近一组（尚未fsync）的事件会在恢复后再次执行（至少执行一次）
+- 续读时直接从最后一个连续完成的事件之后的字节偏移开始解析，不重新解析前面的内容
+"""
+
+import asyncio
+import json
+import os
+from contextlib import aclosing
+from typing import AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+from .core import Event
+
+__all__ = ['EventJournal', 'JournaledEvent']
+
+
+class JournaledEvent(Event):
+    """带有脚本位置的事件（position为(序号, 结束处的字节偏移)，由main_loop在执行完成后记录）"""
+
+    __slots__ = ('position',)
+
+    def __init__(self, event_type: str, data, position: Tuple[int, int]):
+        super().__init__(event_type, data)
+        self.position = position
+
+
+class EventJournal:
+    """事件执行日志（每个脚本使用一个日志文件）"""
+
+    def __init__(self, path: str, group_size: int = 64, group_interval: float = 0.05):
+        """
+        :param path: 日志文件路径（已存在时读取其中的记录，用于续读）
+        :param group_size: 缓冲达到该条数时立即写入并fsync
+        :param group_interval: 记录在缓冲中最多停留的秒数
+        """
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.script: Optional[str] = None  # 日志对应的脚本
+        self.next_seq = 0  # 此前的事件全部已完成
+        self.next_offset = 0  # next_seq之前最后一个事件的结束偏移（续读起点）
+        self.completed: Dict[int, int] = {}  # 在next_seq之后乱序完成的序号 → 结束偏移
+        self.skipped = 0  # 续读时跳过的已完成事件数
+        self.commits = 0  # fsync次数
+        self._lines: List[str] = []  # 待写入的记录
+        self._file = None
+        self._wakeup = asyncio.Event()  # 缓冲达到group_size时唤醒后台任务
+        self._lock = asyncio.Lock()  # 保证同一时间只有一次写入
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._load()
+
+    # ================= 读取 =================
+    def _load(self):
+        """读取已有的记录（中断时写了一半的最后一行被截掉，之后的记录才能正常追加）"""
+        if not os.path.exists(self.path):
+            return
+        valid = 0  # 完整记录的字节数
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if isinstance(record, dict):
+                    self.script = record.get("script")
+                else:
+                    self._mark_done(*record)
+                valid += len(line)
+        if valid < os.path.getsize(self.path):
+            os.truncate(self.path, valid)
+
+    def _mark_done(self, seq: int, offset: int):
+        """更新完成状态（并发模式下完成顺序可能乱序 只有连续完成的部分推进续读起点）"""
+        if seq != self.next_seq:
+            if seq > self.next_seq:
+                self.completed[seq] = offset
+            return
+        self.next_seq, self.next_offset = seq + 1, offset
+        while self.next_seq in self.completed:
+            self.next_offset = self.completed.pop(self.next_seq)
+            self.next_seq += 1
+
+    def resume_point(self) -> Tuple[int, int, Set[int]]:
+        """
+        计算续读位置
+        :return: (下一个事件的序号, 开始读取的字节偏移, 该位置之后已经完成的序号)
+        """
+        return self.next_seq, self.next_offset, set(self.completed)
+
+    async def resume(self, script_path: str, chunk_size: Optional[int] = None) -> AsyncGenerator[Event, None]:
+        """
+        从日志记录的位置读取脚本，产出尚未完成的事件（JournaledEvent），可直接传给Actuator.bind_generator
+        日志为空时从头开始并写入脚本路径；日志属于其他脚本时抛出ValueError
+        """
+        # 延迟导入 EventActuator包本身不依赖FilesIO
+        from FilesIO import DEFAULT_CHUNK_SIZE, JSONEventProcessor
+
+        script = os.path.abspath(script_path)
+        if self.script is None:
+            self.script = script
+            self._lines.append(json.dumps({"script": script}, ensure_ascii=False) + "\n")
+        elif self.script != script:
+            raise ValueError(f"日志 {self.path} 属于脚本 {self.script}，不能用于 {script}")
+
+        seq, offset, done = self.resume_point()
+        if seq or done:
+            print(f"[Journal] 从第 {seq} 个事件继续执行（偏移 {offset}，另有 {len(done)} 个已完成的事件将被跳过）")
+        # 使用独立的解析器：不与全局单例争用文件锁（中途停止的读取不会阻塞续读），也不缓存事件
+        processor = JSONEventProcessor(cache_max_events=0)
+        async with aclosing(processor.stream_events(script_path, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE,
+                                                    offset=offset)) as events:
+            async for event_dict in events:
+                if seq in done:
+                    self.skipped += 1
+                else:
+                    yield JournaledEvent(event_dict["event_type"], event_dict["data"],
+                                         (seq, processor.current_offset))
+                seq += 1
+
+    # ================= 写入 =================
+    def record(self, seq: int, offset: int):
+        """记录一个已完成的事件（只进入缓冲，由后台任务成组写入）"""
+        self._mark_done(seq, offset)
+        self._lines.append(f"[{seq},{offset}]\n")
+        if self._task is None:
+            self._task = asyncio.create_task(self._background_commit())
+        if len(self._lines) >= self.group_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """立即写入缓冲中的记录并fsync"""
+        async with self._lock:
+            if not self._lines:
+                return
+            text = "".join(self._lines)
+            self._lines = []
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._commit, text)
+
+    async def close(self):
+        """写完剩余记录后关闭日志文件"""
+        if self._task is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._closing = False
+        await self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """删除日志文件（脚本完整执行后调用，下次从头开始）"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._lines = []
+        self.next_seq = self.next_offset = 0
+        self.completed.clear()
+        self.script = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def _background_commit(self):
+        """后台成组写入：缓冲达到group_size或等待超时时写入"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.group_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _commit(self, text: str):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(text)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.commits += 1
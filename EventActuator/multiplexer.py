@@ -0,0 +1,191 @@
+"""
+multiplexer.py
+把多个事件来源合并为一个事件流，供Actuator.bind_generator使用
+
+用法：
+    mux = EventMultiplexer(mode="priority")
+    mux.add_source("live", bridge.event_emitter(), priority=10)
+    mux.add_source("script", load_events("saves/test/test.json"), rate=50)
+    actuator.bind_generator(mux.stream())
+    await actuator.main_loop()
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterable, Deque, Dict, Optional, Union
+
+from .core import Event
+
+__all__ = ['EventMultiplexer']
+
+_QUEUE_END = None  # 队列来源收到None时视为结束
+
+
+class _Source:
+    """单个事件来源的状态"""
+
+    __slots__ = ('name', 'priority', 'interval', 'buffer', 'task', 'finished', 'next_time', 'emitted')
+
+    def __init__(self, name: str, priority: int, rate: Optional[float], buffer_size: int):
+        self.name = name
+        self.priority = priority
+        self.interval = 1.0 / rate if rate else 0.0  # 限速时两个事件之间的最小间隔
+        self.buffer: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)  # 有界缓冲 满时来源被挂起
+        self.task: Optional[asyncio.Task] = None
+        self.finished = False
+        self.next_time = 0.0
+        self.emitted = 0
+
+    def ready(self, now: float) -> bool:
+        return not self.buffer.empty() and now >= self.next_time
+
+    @property
+    def drained(self) -> bool:
+        return self.finished and self.buffer.empty()
+
+
+class EventMultiplexer:
+    """多来源事件合并器
+
+    - mode="fair"：各来源轮流产出；mode="priority"：优先产出priority最高的来源，同级轮流
+    - rate：单个来源每秒最多产出的事件数
+    - 每个来源有独立的有界缓冲，消费跟不上时来源自动暂停读取（背压）
+    - main_loop运行期间可以随时add_source/remove_source
+    """
+
+    def __init__(self, mode: str = "fair", buffer_size: int = 64, stop_when_exhausted: bool = False):
+        """
+        :param mode: 调度方式 fair / priority
+        :param buffer_size: 每个来源缓冲的事件数
+        :param stop_when_exhausted: 所有来源结束后是否结束stream（默认一直运行直到close）
+        """
+        if mode not in ("fair", "priority"):
+            raise ValueError("mode must be 'fair' or 'priority'")
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.stop_when_exhausted = stop_when_exhausted
+        self._sources: Dict[str, _Source] = {}
+        self._order: Deque[str] = deque()  # 轮转顺序
+        self._changed = asyncio.Event()  # 来源有新事件/增删来源时唤醒调度
+        self._closed = False
+
+    # ================= 来源管理 =================
+    def add_source(self, name: str, source: Union[AsyncIterable[Any], asyncio.Queue],
+                   priority: int = 0, rate: Optional[float] = None):
+        """
+        添加事件来源
+        :param source: 异步可迭代对象（产出Event或load_events的字典）或asyncio.Queue（放入None表示结束）
+        """
+        if name in self._sources:
+            raise KeyError(f"事件来源 {name} 已存在")
+        state = _Source(name, priority, rate, self.buffer_size)
+        self._sources[name] = state
+        self._order.append(name)
+        state.task = asyncio.get_running_loop().create_task(self._pump(state, source))
+        self._changed.set()
+
+    def remove_source(self, name: str):
+        """移除事件来源（丢弃其缓冲中尚未产出的事件）"""
+        state = self._sources.pop(name, None)
+        if state is None:
+            return
+        self._order.remove(name)
+        if state.task is not None:
+            state.task.cancel()
+        self._changed.set()
+
+    def close(self):
+        """结束合并流（stream在当前事件之后结束）"""
+        self._closed = True
+        for name in list(self._sources):
+            self.remove_source(name)
+        self._changed.set()
+
+    @property
+    def sources(self) -> Dict[str, Dict[str, Any]]:
+        """各来源的状态快照"""
+        return {
+            name: {
+                "priority": state.priority,
+                "buffered": state.buffer.qsize(),
+                "emitted": state.emitted,
+                "finished": state.finished,
+            }
+            for name, state in self._sources.items()
+        }
+
+    async def _pump(self, state: _Source, source):
+        """把来源中的事件搬运到缓冲（缓冲满时在put处等待）"""
+        try:
+            if isinstance(source, asyncio.Queue):
+                while True:
+                    item = await source.get()
+                    if item is _QUEUE_END:
+                        break
+                    await state.buffer.put(item)
+                    self._changed.set()
+            else:
+                async for item in source:
+                    await state.buffer.put(item)
+                    self._changed.set()
+        except asyncio.CancelledError:
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            raise
+        except Exception as e:
+            print(f"[Error] [Multiplexer] 事件来源 {state.name} 出错: {str(e)}")
+        finally:
+            state.finished = True
+            self._changed.set()
+
+    # ================= 调度 =================
+    def _pick(self, now: float) -> Optional[_Source]:
+        """选择下一个产出事件的来源"""
+        order = self._order
+        best = None
+        for _ in range(len(order)):
+            state = self._sources[order[0]]
+            order.rotate(-1)
+            if not state.ready(now):
+                continue
+            if self.mode == "fair":
+                return state
+            if best is None or state.priority > best.priority:
+                best = state
+        if best is not None:
+            # 被选中的来源移到队尾 同级来源轮流产出
+            order.remove(best.name)
+            order.append(best.name)
+        return best
+
+    async def stream(self) -> AsyncGenerator[Event, None]:
+        """合并后的事件流"""
+        while not self._closed:
+            now = time.monotonic()
+            state = self._pick(now)
+            if state is not None:
+                item = state.buffer.get_nowait()
+                if state.interval:
+                    state.next_time = max(state.next_time, now) + state.interval
+                state.emitted += 1
+                if isinstance(item, dict):  # load_events产出的字典
+                    item = Event(item["event_type"], item["data"])
+                yield item
+                continue
+
+            # 清理已结束的来源
+            for name in [name for name, source in self._sources.items() if source.drained]:
+                self.remove_source(name)
+            if self.stop_when_exhausted and not self._sources:
+                return
+
+            # 没有可产出的事件：等待新事件，或等到最近一个限速来源解除
+            self._changed.clear()
+            waits = [s.next_time - now for s in self._sources.values() if not s.buffer.empty()]
+            timeout = max(0.0, min(waits)) if waits else None
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
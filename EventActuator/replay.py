@@ -0,0 +1,237 @@
+"""
+replay.py
+按脚本中的时间字段回放事件：以单调时钟上的绝对截止时间调度，长时间回放不会累积误差
+
+用法：
+    scheduler = ReplayScheduler(load_events("saves/test/test.json"), speed=2.0, late_policy="coalesce")
+    actuator.bind_generator(scheduler.stream())
+    await actuator.main_loop()
+    print(scheduler.stats.snapshot())
+
+时间线规则：
+- sleep事件不再交给执行器休眠，而是直接推迟后续事件的截止时间（absorb_sleep=False时照常转发）
+- 其他事件的duration（以及typewrite的interval×字数）视为动作本身的耗时，之后的事件顺延
+- 每个事件之间额外间隔default_interval秒
+"""
+
+import asyncio
+import math
+import time
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, Iterable, Optional
+
+from .core import Event
+
+__all__ = ['ReplayScheduler', 'ReplayStats', 'LATE_POLICIES']
+
+LATE_POLICIES = ("dispatch", "drop", "coalesce")
+
+_TIME_FIELDS = ("duration", "interval")  # 随速度缩放的字段
+
+
+def _number(value) -> bool:
+    return type(value) in (int, float)
+
+
+class ReplayStats:
+    """回放的时间误差统计（误差 = 实际送出时间 - 截止时间）"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """重置所有计数器"""
+        self.started_at = time.perf_counter()
+        self.scheduled = 0  # 从来源读取的事件数
+        self.dispatched = 0  # 已送出的事件数
+        self.dropped = 0  # 因迟到被丢弃的事件数
+        self.coalesced = 0  # 被后续同类事件合并掉的事件数
+        self.late = 0  # 超过阈值仍然送出的事件数
+        self.total_drift = 0.0
+        self.max_drift = 0.0
+        self.last_drift = 0.0  # 最后一个事件的误差（长时间回放是否漂移）
+
+    def on_dispatch(self, drift: float, late: bool):
+        self.dispatched += 1
+        self.total_drift += drift
+        self.last_drift = drift
+        if drift > self.max_drift:
+            self.max_drift = drift
+        if late:
+            self.late += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        """返回当前统计数据的字典副本"""
+        return {
+            "scheduled": self.scheduled,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "late": self.late,
+            "elapsed": time.perf_counter() - self.started_at,
+            "avg_drift": self.total_drift / self.dispatched if self.dispatched else 0.0,
+            "max_drift": self.max_drift,
+            "last_drift": self.last_drift,
+        }
+
+
+class ReplayScheduler:
+    """基于绝对截止时间的回放调度器
+
+    - speed：回放倍速（0.5为半速，2为两倍速），None或math.inf表示不等待、尽快回放；
+      转发给命令的duration/interval字段同样按倍速缩放
+    - 迟到超过late_threshold秒的late_types事件按late_policy处理：
+        dispatch 照常送出；drop 丢弃；
+        coalesce 与后面已经到期的同类事件合并，只送出最新的一个（例如鼠标移动只保留最终位置）
+      其他类型的事件（点击、按键等）迟到时总是照常送出
+    """
+
+    def __init__(self,
+                 source: AsyncIterable[Any],
+                 speed: Optional[float] = 1.0,
+                 late_policy: str = "dispatch",
+                 late_threshold: float = 0.010,
+                 late_types: Iterable[str] = ("mouse_move", "mouse_move_abs"),
+                 default_interval: float = 0.0,
+                 absorb_sleep: bool = True,
+                 spin: float = 0.002):
+        """
+        :param source: 事件来源（产出Event或load_events的字典）
+        :param speed: 回放倍速
+        :param late_policy: 迟到事件的处理方式 dispatch / drop / coalesce
+        :param late_threshold: 判定为迟到的秒数
+        :param late_types: 适用迟到策略的事件类型
+        :param default_interval: 相邻事件之间的间隔秒数（按脚本时间计）
+        :param absorb_sleep: 是否由调度器处理sleep事件
+        :param spin: 截止时间前最后多少秒改为让出循环等待（asyncio.sleep精度约为毫秒级），0表示不使用
+        """
+        if late_policy not in LATE_POLICIES:
+            raise ValueError(f"late_policy must be one of {LATE_POLICIES}")
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.source = source
+        self.speed = None if speed is None or math.isinf(speed) else float(speed)
+        self.late_policy = late_policy
+        self.late_threshold = late_threshold
+        self.late_types = frozenset(late_types)
+        self.default_interval = default_interval
+        self.absorb_sleep = absorb_sleep
+        self.spin = spin
+        self.stats = ReplayStats()
+        self._running = False
+
+    def stop(self):
+        """停止回放（stream在当前事件之后结束）"""
+        self._running = False
+
+    # ================= 时间线 =================
+    def _scaled(self, seconds: float) -> float:
+        """脚本时间 → 实际时间"""
+        return 0.0 if self.speed is None else seconds / self.speed
+
+    def _scale_data(self, data):
+        """按倍速缩放转发给命令的时间字段（返回副本，不修改原数据）"""
+        if self.speed == 1.0 or not isinstance(data, dict):
+            return data
+        if not any(_number(data.get(key)) for key in _TIME_FIELDS):
+            return data
+        data = dict(data)
+        for key in _TIME_FIELDS:
+            if _number(data.get(key)):
+                data[key] = self._scaled(data[key])
+        return data
+
+    @staticmethod
+    def _action_time(event: Event) -> float:
+        """事件本身占用的脚本时间"""
+        data = event.data
+        if not isinstance(data, dict):
+            return 0.0
+        if event.type == "sleep":
+            value = data.get("duration", data.get("sleep", 0))
+            return float(value) if _number(value) else 0.0
+        seconds = float(data["duration"]) if _number(data.get("duration")) else 0.0
+        text = data.get("text")
+        if _number(data.get("interval")) and isinstance(text, str):
+            seconds += data["interval"] * len(text)  # typewrite逐字输入的耗时
+        return seconds
+
+    async def _wait_until(self, deadline: float):
+        """等待到截止时间：先粗略休眠，最后spin秒内逐次让出事件循环"""
+        loop = asyncio.get_running_loop()
+        remaining = deadline - loop.time()
+        if remaining > self.spin:
+            await asyncio.sleep(remaining - self.spin)
+        while loop.time() < deadline:
+            await asyncio.sleep(0)
+
+    # ================= 对外接口 =================
+    async def stream(self) -> AsyncGenerator[Event, None]:
+        """按截止时间送出事件，可直接传给Actuator.bind_generator"""
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        stats.reset()
+        self._running = True
+        iterator = self.source.__aiter__()
+        start = loop.time()
+        cursor = 0.0  # 当前事件在脚本时间线上的位置
+        pending: Optional[Event] = None  # 合并时预读的下一个事件
+
+        async def next_event() -> Optional[Event]:
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return None
+            stats.scheduled += 1
+            if isinstance(item, dict):  # load_events产出的字典
+                item = Event(item["event_type"], item["data"])
+            return item
+
+        try:
+            while self._running:
+                if pending is not None:
+                    event, pending = pending, None
+                else:
+                    event = await next_event()
+                    if event is None:
+                        break
+
+                deadline = start + self._scaled(cursor)
+                cursor += self._action_time(event) + self.default_interval
+
+                if event.type == "sleep" and self.absorb_sleep:
+                    continue
+
+                if self.speed is None:  # 尽快回放：不等待也不统计误差
+                    drift, late = 0.0, False
+                else:
+                    await self._wait_until(deadline)
+                    drift = loop.time() - deadline
+                    late = drift > self.late_threshold
+
+                if late and event.type in self.late_types:
+                    if self.late_policy == "drop":
+                        stats.dropped += 1
+                        continue
+                    if self.late_policy == "coalesce":
+                        # 后面已经到期的同类事件覆盖当前事件
+                        while True:
+                            pending = await next_event()
+                            if pending is None or pending.type != event.type:
+                                break
+                            if start + self._scaled(cursor) > loop.time():
+                                break  # 下一个还没到期 正常调度
+                            stats.coalesced += 1
+                            event, pending = pending, None
+                            deadline = start + self._scaled(cursor)
+                            cursor += self._action_time(event) + self.default_interval
+                        drift = loop.time() - deadline
+                        late = drift > self.late_threshold
+
+                stats.on_dispatch(drift, late)
+                data = self._scale_data(event.data)
+                yield event if data is event.data else Event(event.type, data)
+        finally:
+            self._running = False
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
@@ -0,0 +1,104 @@
+"""
+schema.py
+命令参数的声明式校验与事件脚本的预编译
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+__all__ = ['PayloadSchema', 'ScriptValidationError', 'CompiledScript', 'NUMBER']
+
+NUMBER = (int, float)  # 坐标、时长等数值参数的常用类型
+
+FieldSpec = Union[None, type, Tuple[type, ...]]  # None表示不限制类型
+
+
+class ScriptValidationError(ValueError):
+    """事件脚本预编译失败（包含所有出错事件的信息）"""
+
+    def __init__(self, errors: List[Tuple[int, str, str]]):
+        self.errors = errors  # [(事件序号, 事件类型, 错误信息)]
+        lines = "\n".join(f"  #{index} {event_type}: {message}" for index, event_type, message in errors[:20])
+        more = f"\n  ... 共 {len(errors)} 个错误" if len(errors) > 20 else ""
+        super().__init__(f"事件脚本校验失败:\n{lines}{more}")
+
+
+class PayloadSchema:
+    """命令参数的结构声明
+
+    用法：
+        PayloadSchema(required={"x": NUMBER, "y": NUMBER})
+        PayloadSchema(payload_type=str)  # 参数本身是字符串
+        PayloadSchema(optional={"path": str}, defaults={"absolute_path": True}, allow_none=True)
+    """
+
+    def __init__(self,
+                 required: Optional[Dict[str, FieldSpec]] = None,
+                 optional: Optional[Dict[str, FieldSpec]] = None,
+                 defaults: Optional[Dict[str, Any]] = None,
+                 payload_type: type = dict,
+                 allow_none: bool = False):
+        self.required = required or {}
+        self.optional = optional or {}
+        self.defaults = defaults or {}
+        self.payload_type = payload_type
+        self.allow_none = allow_none
+
+    @classmethod
+    def coerce(cls, schema: Union['PayloadSchema', Dict[str, FieldSpec], None]) -> Optional['PayloadSchema']:
+        """把register时传入的简写（字段字典）转换为PayloadSchema"""
+        if schema is None or isinstance(schema, PayloadSchema):
+            return schema
+        if isinstance(schema, dict):
+            return cls(required=schema)
+        raise TypeError("schema必须为PayloadSchema或字段字典")
+
+    def validate(self, data: Any) -> Any:
+        """校验参数，返回补全默认值后的参数（不修改传入的对象）"""
+        if data is None:
+            if self.allow_none:
+                return dict(self.defaults) if self.payload_type is dict else None
+            raise ValueError("缺少参数")
+        if not isinstance(data, self.payload_type):
+            raise ValueError(f"参数必须为 {self.payload_type.__name__} 类型")
+        if self.payload_type is not dict:
+            return data
+
+        for key, spec in self.required.items():
+            if key not in data:
+                raise ValueError(f"缺少参数 {key!r}")
+            self._check_type(key, data[key], spec)
+        for key, spec in self.optional.items():
+            if key in data:
+                self._check_type(key, data[key], spec)
+
+        missing = [key for key in self.defaults if key not in data]
+        if missing:
+            data = dict(data)
+            for key in missing:
+                data[key] = self.defaults[key]
+        return data
+
+    @staticmethod
+    def _check_type(key: str, value: Any, spec: FieldSpec):
+        if spec is None:
+            return
+        # bool是int的子类 数值参数不接受布尔值
+        if isinstance(value, bool) and bool not in (spec if isinstance(spec, tuple) else (spec,)):
+            raise ValueError(f"参数 {key!r} 类型错误: {type(value).__name__}")
+        if not isinstance(value, spec):
+            raise ValueError(f"参数 {key!r} 类型错误: {type(value).__name__}")
+
+
+class CompiledScript:
+    """预编译后的事件脚本：(处理函数, 已校验参数, 事件类型) 的列表"""
+
+    __slots__ = ('steps',)
+
+    def __init__(self, steps: List[Tuple[Callable[[Any], Awaitable[None]], Any, str]]):
+        self.steps = steps
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __iter__(self) -> Iterable[Tuple[Callable[[Any], Awaitable[None]], Any, str]]:
+        return iter(self.steps)
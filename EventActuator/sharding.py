@@ -0,0 +1,265 @@
+"""
+sharding.py
+多进程分片执行：按键把事件分配给N个工作进程，每个进程运行自己的Actuator
+
+用法：
+    sharded = ShardedActuator(
+        workers=4,
+        setup=["EventActuator.commands.LoggerInstructionLibrary:register_commands"],
+    )
+    sharded.bind_generator(event_gen())
+    await sharded.main_loop()
+
+注意：
+- 工作进程使用spawn方式启动，脚本入口需要放在 if __name__ == "__main__" 之下
+- 事件数据需要可以pickle（例如log_open的hook不能是lambda）
+- 不带path的log_close/log_flush发送给所有进程；工作进程结束前执行log_close关闭本进程打开的日志文件
+"""
+
+import asyncio
+import hashlib
+import importlib
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Callable, Dict, Hashable, Iterable, List, Optional, Union
+
+from .core import Event, get_actuator, default_channel_key
+
+__all__ = ['ShardedActuator']
+
+_SHUTDOWN = None  # 发送给工作进程的结束标记
+
+
+def _resolve(target: Union[str, Callable]) -> Callable:
+    """把"模块:函数"形式的字符串解析为函数"""
+    if callable(target):
+        return target
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# ================= 工作进程 =================
+def _worker_main(conn, setup: List[Union[str, Callable]], concurrency: Optional[int],
+                 shutdown_commands: Iterable[str] = ()):
+    """工作进程入口：注册命令后执行收到的事件批次"""
+    for target in setup:
+        _resolve(target)()  # 注册命令到本进程的全局执行器
+    asyncio.run(_worker_loop(get_actuator(), conn, concurrency, shutdown_commands))
+
+
+async def _run_shutdown_commands(actuator, names: Iterable[str]):
+    """依次执行已注册的结束命令（数据为None，按schema转换为默认参数）"""
+    for name in names:
+        handler = actuator.commands.get(name)
+        if handler is None:
+            continue
+        try:
+            schema = actuator.schemas.get(name)
+            await handler(schema.validate(None) if schema is not None else None)
+        except Exception as e:
+            print(f"[Error] [Sharding] 结束命令 {name} 执行出错: {str(e)}")
+
+
+async def _worker_loop(actuator, conn, concurrency: Optional[int], shutdown_commands: Iterable[str] = ()):
+    loop = asyncio.get_running_loop()
+    receiver = ThreadPoolExecutor(max_workers=1)  # 阻塞的recv放在线程中 不占用事件循环
+
+    async def receive() -> AsyncGenerator[Event, None]:
+        while True:
+            batch = await loop.run_in_executor(receiver, conn.recv)
+            if batch is _SHUTDOWN:
+                return
+            for event_type, data in batch:
+                yield Event(event_type, data)
+
+    actuator.bind_generator(receive())
+    try:
+        await actuator.main_loop(concurrency=concurrency)
+    finally:
+        await _run_shutdown_commands(actuator, shutdown_commands)  # 例如关闭本进程仍然打开的日志文件
+        try:
+            conn.send(actuator.stats.snapshot())  # 结束时回传统计数据
+        except OSError:
+            pass  # 主进程已关闭管道
+        conn.close()
+        receiver.shutdown(wait=False)
+
+
+# ================= 主进程 =================
+class ShardedActuator:
+    """多进程分片执行器
+
+    - key_func决定事件的分片键（默认与并发模式相同：日志命令按path，其余共用一个键），
+      同一个键的事件总是发送到同一个进程，保持相对顺序
+    - 事件按批次通过管道发送，每个进程最多有一个批次在发送中（背压）
+    - broadcast_commands中的命令不带path时发送给所有进程（例如关闭/刷新全部日志文件）
+    - 收到exit事件时发送剩余批次，通知所有进程结束并等待退出；
+      各进程结束前执行shutdown_commands（数据为None）
+    """
+
+    def __init__(self,
+                 workers: int = 4,
+                 setup: Iterable[Union[str, Callable]] = (),
+                 key_func: Callable[[Event], Hashable] = default_channel_key,
+                 batch_size: int = 256,
+                 flush_interval: float = 0.05,
+                 worker_concurrency: Optional[int] = None,
+                 broadcast_commands: Iterable[str] = ("log_close", "log_flush"),
+                 shutdown_commands: Iterable[str] = ("log_close",)):
+        """
+        :param workers: 工作进程数量
+        :param setup: 每个进程启动时调用的命令注册函数（可pickle的函数或"模块:函数"字符串）
+        :param key_func: 分片键函数
+        :param batch_size: 每批最多包含的事件数
+        :param flush_interval: 未满的批次最多等待的秒数
+        :param worker_concurrency: 工作进程内main_loop的并发数（None为顺序执行）
+        :param broadcast_commands: 不带path时发送给所有进程的命令
+        :param shutdown_commands: 工作进程结束前执行的命令（未注册的命令跳过）
+        """
+        self.workers = workers
+        self.setup = list(setup)
+        self.key_func = key_func
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.worker_concurrency = worker_concurrency
+        self.broadcast_commands = set(broadcast_commands)
+        self.shutdown_commands = list(shutdown_commands)
+        self.generator = None
+        self.running = False
+        self.worker_stats: List[Dict[str, Any]] = []  # 各进程结束时回传的统计数据
+        self.sent = [0] * workers  # 发送到各进程的事件数
+
+    def bind_generator(self, gen: AsyncGenerator[Event, None]):
+        """绑定事件生成器（与Actuator相同）"""
+        self.generator = gen
+
+    def stop(self):
+        """停止读取事件（已读取的事件仍会发送完毕）"""
+        self.running = False
+
+    def shard_of(self, event: Event) -> int:
+        """计算事件所属的进程序号（blake2b各次运行结果一致，且只差一个字符的键也能均匀分散）"""
+        digest = hashlib.blake2b(str(self.key_func(event)).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.workers
+
+    def shards_of(self, event: Event) -> Iterable[int]:
+        """计算事件需要发送到的进程序号（不带path的广播命令发送给所有进程）"""
+        if event.type in self.broadcast_commands:
+            data = event.data
+            if not (isinstance(data, dict) and data.get("path")):
+                return range(self.workers)
+        return (self.shard_of(event),)
+
+    async def main_loop(self):
+        """启动工作进程并分发事件，直到生成器结束或收到exit事件"""
+        if not self.generator:
+            raise RuntimeError("[Error] Event generator must be bound first!")
+
+        context = multiprocessing.get_context("spawn")
+        loop = asyncio.get_running_loop()
+        connections, processes = [], []
+        for _ in range(self.workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main,
+                                      args=(child_conn, self.setup, self.worker_concurrency,
+                                            self.shutdown_commands),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            connections.append(parent_conn)
+            processes.append(process)
+
+        # 每个进程一个发送线程：发送不阻塞事件循环 且同一进程的批次保持顺序
+        senders = [ThreadPoolExecutor(max_workers=1) for _ in range(self.workers)]
+        in_flight: List[Optional[asyncio.Future]] = [None] * self.workers
+        batches: List[list] = [[] for _ in range(self.workers)]
+        oldest = [0.0] * self.workers  # 各批次第一个事件的时间
+
+        async def send(index: int, payload):
+            if in_flight[index] is not None:
+                await in_flight[index]  # 上一批还没发出去时等待（背压）
+            in_flight[index] = loop.run_in_executor(senders[index], connections[index].send, payload)
+
+        async def flush(index: int):
+            if batches[index]:
+                batch, batches[index] = batches[index], []
+                self.sent[index] += len(batch)
+                await send(index, batch)
+
+        async def flush_due():
+            """按时间发送等待过久的批次"""
+            now = loop.time()
+            for index in range(self.workers):
+                if batches[index] and now - oldest[index] >= self.flush_interval:
+                    await flush(index)
+
+        self.running = True
+        self.sent = [0] * self.workers
+        iterator = self.generator.__aiter__()
+        next_item: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if next_item is None:
+                    next_item = asyncio.ensure_future(iterator.__anext__())
+                deadlines = [oldest[index] + self.flush_interval for index in range(self.workers) if batches[index]]
+                if deadlines:
+                    # 有未发送的批次时限时等待 来源停顿时也按flush_interval发送（不取消正在读取的事件）
+                    done, _ = await asyncio.wait({next_item}, timeout=max(0.0, min(deadlines) - loop.time()))
+                    if not done:
+                        await flush_due()
+                        continue
+                try:
+                    event = await next_item
+                except StopAsyncIteration:
+                    break
+                next_item = None
+
+                if not self.running:
+                    break
+                if event.type == "exit":
+                    print(f"[END]: {(event.data or {}).get('end', '0')}")
+                    break
+
+                for index in self.shards_of(event):
+                    if not batches[index]:
+                        oldest[index] = loop.time()
+                    batches[index].append((event.type, event.data))
+                    if len(batches[index]) >= self.batch_size:
+                        await flush(index)
+                await flush_due()
+        finally:
+            self.running = False
+            if next_item is not None and not next_item.done():
+                next_item.cancel()
+                await asyncio.wait({next_item})
+
+            # 工作进程已退出（管道断开）时跳过该进程 其余进程照常结束
+            alive = []
+            for index in range(self.workers):
+                try:
+                    await flush(index)
+                    await send(index, _SHUTDOWN)
+                    alive.append(index)
+                except OSError as e:
+                    print(f"[Error] [Sharding] 工作进程 {index} 不可用: {str(e)}")
+            for index in alive:
+                try:
+                    await in_flight[index]
+                except OSError as e:
+                    print(f"[Error] [Sharding] 工作进程 {index} 不可用: {str(e)}")
+            self.worker_stats = [await loop.run_in_executor(senders[index], self._collect, connections[index])
+                                 for index in range(self.workers)]
+            for process in processes:
+                await loop.run_in_executor(None, process.join)
+            for executor in senders:
+                executor.shutdown(wait=False)
+
+    @staticmethod
+    def _collect(conn) -> Dict[str, Any]:
+        """读取工作进程回传的统计数据"""
+        try:
+            return conn.recv()
+        except (EOFError, OSError):
+            return {}
+        finally:
+            conn.close()
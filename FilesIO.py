@@ -1,22 +1,54 @@
 import asyncio
+import atexit
 import json
 import os
+import sys
+import sqlite3
 import datetime
+import time
 import aiofiles
 from ast import literal_eval
+from concurrent.futures import ThreadPoolExecutor
 from collections import deque
+from contextlib import aclosing
+from itertools import islice
 from os import PathLike
-from typing import Generator, Dict, Union, Optional, AsyncGenerator, Callable, Any, Deque
+from typing import Generator, Dict, Union, Optional, AsyncGenerator, Callable, Any, Deque, Iterable
 from datetime import datetime
 
 
 # __all__ = ["get_files", "name_file", "generate_log_header", "check_directory", ]
-__all__ = ['JSONEventProcessor', 'get_json_processor', 'load_events']
+__all__ = ['JSONEventProcessor', 'JSONArrayStreamParser', 'EventCache', 'BatchHook', 'get_json_processor', 'load_events',
+           'append_events', 'convert_script', 'write_script', 'iter_script', 'is_jsonl_path']
+
+def _scan_directory(path: str) -> tuple:
+    """读取单个目录，返回(子目录列表, 文件列表)
+
+    子目录项为(name, path, is_symlink)，文件项为(name, path)；目录无法读取时返回空列表（与os.walk一致）
+    """
+    dirs, files = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append((entry.name, entry.path, entry.is_symlink()))
+                else:
+                    files.append((entry.name, entry.path))
+    except OSError:
+        pass
+    return dirs, files
+
 
 def get_files(
         directory: Union[str, PathLike[str]],
         max_depth: int = 2,
-        absolute: bool = False
+        absolute: bool = False,
+        workers: int = 0,
+        index: Union['DirectoryIndex', str, None] = None
 ) -> Generator[Dict[str, Union[str, None]], None, None]:
     """
     遍历指定目录下的文件和文件夹，生成包含信息的字典生成器
@@ -24,86 +56,279 @@ def get_files(
     :param directory: 要遍历的根目录路径（支持字符串或PathLike对象）
     :param max_depth: 最大嵌套层数（默认2层）
     :param absolute: 是否返回绝对路径（默认False返回相对路径）
+    :param workers: 大于0时使用线程池并行读取子目录（产出顺序不变）
+    :param index: DirectoryIndex实例或索引文件路径；指定时先增量刷新索引，再从索引中查询（按路径排序）
     :yield: 包含path、name、suffix和Disk（Windows）的字典
     """
+    if max_depth < 0:
+        return
+
+    if index is not None:
+        if not isinstance(index, DirectoryIndex):
+            with DirectoryIndex(directory, index) as opened_index:
+                opened_index.refresh(max_depth=max_depth)
+                yield from opened_index.query(max_depth=max_depth, absolute=absolute)
+            return
+        index.refresh(max_depth=max_depth)
+        yield from index.query(max_depth=max_depth, absolute=absolute)
+        return
+
     # 类型安全处理输入路径
-    safe_directory = str(directory)
-    start_directory = os.path.abspath(safe_directory)
+    start_directory = os.path.abspath(str(directory))
     is_windows = os.name == 'nt'
+    drive = os.path.splitdrive(start_directory)[0]
+    drive_length = len(drive)
+    convert_sep = os.sep != '/'
+
+    # 并行模式下提前提交子目录的读取任务 按深度优先顺序取结果
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    def submit(path: str):
+        return executor.submit(_scan_directory, path) if executor else path
+
+    def collect(job) -> tuple:
+        return job.result() if executor else _scan_directory(job)
+
+    def make_path(full_path: str, rel_path: str) -> str:
+        # 路径由字符串拼接得到 不再逐个调用abspath/relpath
+        if absolute:
+            path = full_path[drive_length:] if is_windows else full_path
+            return path.replace(os.sep, '/') if convert_sep else path
+        return rel_path
+
+    stack = [(submit(start_directory), "", 0)]  # (读取任务, 相对路径前缀, 深度)
+    try:
+        while stack:
+            job, prefix, depth = stack.pop()
+            dirs, files = collect(job)
+            children = []
+
+            # 处理子目录（在下降之前按深度剪枝）
+            for dir_name, dir_path, is_symlink in dirs:
+                rel_path = prefix + dir_name
+                entry = {
+                    'path': make_path(dir_path, rel_path),
+                    'name': dir_name,
+                    'suffix': 'folder'
+                }
+                if is_windows:
+                    entry['Disk'] = drive
+                yield entry
+
+                if depth < max_depth and not is_symlink:  # 与os.walk一致 不跟随符号链接
+                    children.append((submit(dir_path), rel_path + '/', depth + 1))
+
+            # 处理文件
+            for filename, file_path in files:
+                # 分割文件名和后缀
+                if '.' in filename:
+                    name_part, suffix_part = filename.split('.', 1)
+                else:
+                    name_part = filename
+                    suffix_part = None
+
+                entry = {
+                    'path': make_path(file_path, prefix + filename),
+                    'name': name_part,
+                    'suffix': suffix_part
+                }
+                if is_windows:
+                    entry['Disk'] = drive
+                yield entry
+
+            stack.extend(reversed(children))
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DirectoryIndex:
+    """get_files的持久化目录索引（sqlite3）
+
+    - 记录每个条目的path、name、suffix、size、mtime，查询时无需再遍历磁盘
+    - refresh只重新读取修改时间发生变化的目录（新增/删除/重命名条目会改变所在目录的mtime）；
+      原地修改的文件不会改变目录mtime，需要最新的size/mtime时使用refresh(full=True)
+    - refresh(max_depth=n)只读取到第n层，更深的目录等到以更大的max_depth刷新时才读取
+    - query支持按后缀和通配符（GLOB语法，区分大小写）筛选
+    """
 
-    for root, dirs, files in os.walk(start_directory):
-        # 计算当前路径信息
-        current_path = os.path.abspath(root)
-        rel_path = os.path.relpath(current_path, start_directory)
-
-        # 计算当前深度
-        current_depth = 0 if rel_path == '.' else len(rel_path.split(os.path.sep))
-
-        # 深度控制逻辑
-        if current_depth > max_depth:
-            del dirs[:]  # 阻止继续深入遍历
-            continue
-
-        # 处理子目录
-        for dir_name in dirs[:]:  # 使用副本遍历
-            # 构建安全路径并处理类型
-            subdir_path = os.path.join(root, dir_name)
-            safe_subdir = str(subdir_path)  # 强制转换为字符串
-
-            # 计算绝对路径和盘符
-            abs_subdir_path = os.path.abspath(safe_subdir)
-            drive, path_part = os.path.splitdrive(abs_subdir_path)
-
-            # 构造返回路径
-            if absolute:
-                path = path_part if is_windows else abs_subdir_path
-            else:
-                path = os.path.relpath(abs_subdir_path, start_directory)
-
-            # 统一路径分隔符
-            normalized_path = path.replace(os.sep, '/')
-
-            # 构建条目
-            entry = {
-                'path': normalized_path,
-                'name': dir_name,
-                'suffix': 'folder'
-            }
-            if is_windows:
-                entry['Disk'] = drive
-            yield entry
-
-        # 处理文件
-        for filename in files:
-            # 构建安全路径
-            full_path = os.path.join(root, filename)
-            safe_full_path = str(full_path)  # 强制类型转换
-
-            # 计算绝对路径和盘符
-            abs_full_path = os.path.abspath(safe_full_path)
-            drive, path_part = os.path.splitdrive(abs_full_path)
-
-            # 构造返回路径
-            if absolute:
-                path = path_part if is_windows else abs_full_path
-            else:
-                path = os.path.relpath(abs_full_path, start_directory)
-
-            # 统一路径分隔符
-            normalized_path = path.replace(os.sep, '/')
-
-            # 分割文件名和后缀
-            if '.' in filename:
-                name_part, suffix_part = filename.split('.', 1)
-            else:
-                name_part = filename
-                suffix_part = None
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS dirs (rel TEXT PRIMARY KEY, mtime_ns INTEGER, depth INTEGER);
+        CREATE TABLE IF NOT EXISTS entries (
+            path TEXT PRIMARY KEY, parent TEXT, depth INTEGER, filename TEXT, name TEXT, suffix TEXT,
+            is_dir INTEGER, is_symlink INTEGER, size INTEGER, mtime_ns INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+        CREATE INDEX IF NOT EXISTS entries_suffix ON entries (suffix);
+    """
 
-            # 构建条目
+    def __init__(self, directory: Union[str, PathLike[str]], index_path: str):
+        """
+        :param directory: 建立索引的根目录
+        :param index_path: 索引文件路径（建议放在根目录之外；位于根目录内时会排除索引文件本身，
+                           但每次写入索引都会改变所在目录的mtime，导致该目录下次被重新读取）
+        """
+        self.root = os.path.abspath(str(directory))
+        self.index_path = os.path.abspath(index_path)
+        self._db = sqlite3.connect(self.index_path)
+        self._db.executescript(self._SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        if row is None or row[0] != self.root:
+            # 新索引或根目录变化时清空旧数据
+            with self._db:
+                self._db.execute("DELETE FROM dirs")
+                self._db.execute("DELETE FROM entries")
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('root', ?)", (self.root,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """关闭索引数据库"""
+        self._db.close()
+
+    def _full_path(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split('/')) if rel else self.root
+
+    def _is_index_file(self, path: str) -> bool:
+        # 包括sqlite的-journal/-wal等临时文件
+        return path.startswith(self.index_path)
+
+    def refresh(self, full: bool = False, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """增量刷新索引
+
+        :param full: 为True时重新读取所有目录
+        :param max_depth: 与get_files相同的层数限制（None为不限制），不再下降到更深的目录；
+                          之前已索引的更深目录保留，所在目录仍然存在时不删除
+        :return: {'scanned': 重新读取的目录数, 'skipped': 未变化的目录数, 'removed': 删除的目录数}
+        """
+        db = self._db
+        known = {rel: (mtime_ns, depth)
+                 for rel, mtime_ns, depth in db.execute("SELECT rel, mtime_ns, depth FROM dirs")}
+        seen = set()
+        scanned = skipped = 0
+        stack = [("", 0)]
+
+        with db:  # 整个刷新过程在一个事务中完成
+            while stack:
+                rel, depth = stack.pop()
+                try:
+                    mtime_ns = os.stat(self._full_path(rel)).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(rel)
+
+                if not full and rel in known and known[rel][0] == mtime_ns:
+                    # 目录未变化 子目录列表直接取自索引
+                    child_dirs = [row[0] for row in db.execute(
+                        "SELECT path FROM entries WHERE parent = ? AND is_dir = 1 AND is_symlink = 0", (rel,))]
+                    skipped += 1
+                else:
+                    child_dirs = self._rescan(rel, depth)
+                    db.execute("INSERT OR REPLACE INTO dirs (rel, mtime_ns, depth) VALUES (?, ?, ?)",
+                               (rel, mtime_ns, depth))
+                    scanned += 1
+
+                if max_depth is None or depth < max_depth:
+                    stack.extend((child, depth + 1) for child in child_dirs)
+
+            removed = []
+            # 按深度从浅到深处理：上层目录被删除后 其子目录的条目随之消失
+            for rel in sorted((rel for rel in known if rel not in seen), key=lambda rel: known[rel][1]):
+                if max_depth is not None and known[rel][1] > max_depth and db.execute(
+                        "SELECT 1 FROM entries WHERE path = ? AND is_dir = 1 AND is_symlink = 0", (rel,)).fetchone():
+                    continue  # 超出本次层数 且仍然是已索引的目录：保留到下次读取更深层时
+                removed.append(rel)
+                db.execute("DELETE FROM dirs WHERE rel = ?", (rel,))
+                db.execute("DELETE FROM entries WHERE parent = ?", (rel,))
+
+        return {'scanned': scanned, 'skipped': skipped, 'removed': len(removed)}
+
+    def _rescan(self, rel: str, depth: int) -> list:
+        """重新读取单个目录的条目，返回需要继续下降的子目录"""
+        self._db.execute("DELETE FROM entries WHERE parent = ?", (rel,))
+        prefix = rel + '/' if rel else ""
+        rows = []
+        child_dirs = []
+        try:
+            with os.scandir(self._full_path(rel)) as it:
+                for entry in it:
+                    if self._is_index_file(entry.path):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                        is_symlink = entry.is_symlink()
+                        stat = entry.stat()
+                        size, mtime_ns = (0 if is_dir else stat.st_size), stat.st_mtime_ns
+                    except OSError:
+                        is_dir, is_symlink, size, mtime_ns = False, False, None, None
+
+                    entry_rel = prefix + entry.name
+                    if is_dir:
+                        name_part, suffix_part = entry.name, 'folder'
+                        if not is_symlink:
+                            child_dirs.append(entry_rel)
+                    elif '.' in entry.name:
+                        name_part, suffix_part = entry.name.split('.', 1)
+                    else:
+                        name_part, suffix_part = entry.name, None
+                    rows.append((entry_rel, rel, depth, entry.name, name_part, suffix_part,
+                                 int(is_dir), int(is_symlink), size, mtime_ns))
+        except OSError:
+            pass
+        self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return child_dirs
+
+    def query(
+            self,
+            suffix: Union[str, tuple, None] = None,
+            pattern: Optional[str] = None,
+            max_depth: Optional[int] = None,
+            absolute: bool = False,
+            include_dirs: bool = True
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        从索引中查询条目（不访问磁盘）
+
+        :param suffix: 后缀或后缀元组（不含点号，例如"json"；文件夹的后缀为"folder"）
+        :param pattern: 文件名通配符，例如"*.json"、"test_??.log"
+        :param max_depth: 与get_files相同的层数限制
+        :param absolute: 是否返回绝对路径
+        :param include_dirs: 是否包含文件夹
+        :yield: 与get_files相同的字典，另含size和mtime（秒）
+        """
+        sql = "SELECT path, name, suffix, size, mtime_ns FROM entries WHERE 1 = 1"
+        params = []
+        if suffix is not None:
+            suffixes = (suffix,) if isinstance(suffix, str) else tuple(suffix)
+            suffixes = tuple(item.lstrip('.') for item in suffixes)
+            sql += f" AND suffix IN ({', '.join('?' * len(suffixes))})"
+            params.extend(suffixes)
+        if pattern is not None:
+            sql += " AND filename GLOB ?"
+            params.append(pattern)
+        if max_depth is not None:
+            sql += " AND depth <= ?"
+            params.append(max_depth)
+        if not include_dirs:
+            sql += " AND is_dir = 0"
+        sql += " ORDER BY path"
+
+        is_windows = os.name == 'nt'
+        drive, root_part = os.path.splitdrive(self.root)
+        root_prefix = (root_part if is_windows else self.root).replace(os.sep, '/').rstrip('/') + '/'
+
+        for path, name, suffix_part, size, mtime_ns in self._db.execute(sql, params):
             entry = {
-                'path': normalized_path,
-                'name': name_part,
-                'suffix': suffix_part
+                'path': root_prefix + path if absolute else path,
+                'name': name,
+                'suffix': suffix_part,
+                'size': size,
+                'mtime': mtime_ns / 1e9 if mtime_ns is not None else None
             }
             if is_windows:
                 entry['Disk'] = drive
@@ -316,15 +541,406 @@ def check_directory(path: str, absolute_path: bool = False, create_if_missing: b
 
 # ================= 超级json读取器 =================
 
+DEFAULT_CHUNK_SIZE = 64 * 1024  # 流式读取时每次读取的字符数
+
+
+class JSONArrayStreamParser:
+    """顶层JSON数组的增量解析器
+
+    每次feed一个文本块，返回其中已经完整的数组元素；
+    缓冲区只保留尚未解析完的尾部，内存占用与文件大小无关
+    """
+
+    _WHITESPACE = " \t\n\r"
+    _DELIMITERS = ",]" + _WHITESPACE  # 可以出现在完整元素之后的字符
+
+    def __init__(self, track_offsets: bool = False, offset: int = 0):
+        """
+        :param track_offsets: 是否记录每个元素结束处的字节偏移（UTF-8），结果见item_ends
+        :param offset: 起始字节偏移；非0时表示从某个元素之后续读（即上次记录的item_ends值）
+        """
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "sep" if offset else "start"  # start -> first -> item -> sep -> end
+        self.track_offsets = track_offsets
+        self.item_ends = []  # 与最近一次feed/close返回的元素一一对应的结束字节偏移
+        self._mark = 0  # 缓冲区中已换算为字节偏移的位置
+        self._mark_bytes = offset  # _mark处对应的文件字节偏移
+
+    def feed(self, chunk: str) -> list:
+        """输入新的文本块，返回本次解析出的完整元素列表"""
+        if self.track_offsets:
+            # 即将丢弃的部分先换算为字节数
+            self._mark_bytes += len(self._buffer[self._mark:self._pos].encode("utf-8"))
+            self._mark = 0
+            self.item_ends = []
+        # 丢弃已经解析过的部分 避免缓冲区随文件增长
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return self._drain(final=False)
+
+    def close(self) -> list:
+        """输入结束，解析剩余内容并校验数组是否完整"""
+        self.item_ends = []
+        items = self._drain(final=True)
+        if self._state != "end":
+            raise json.JSONDecodeError("Unterminated JSON array", self._buffer, self._pos)
+        return items
+
+    _skip_whitespace_match = staticmethod(json.decoder.WHITESPACE.match)  # 与json模块相同的编译正则（C实现的扫描）
+
+    def _skip_whitespace(self):
+        # 大多数位置没有空白或只有一个换行：逐个检查前两个字符，连续的空白（缩进）才交给正则
+        buffer, pos = self._buffer, self._pos
+        if pos < len(buffer) and buffer[pos] in self._WHITESPACE:
+            pos += 1
+            if pos < len(buffer) and buffer[pos] in self._WHITESPACE:
+                pos = self._skip_whitespace_match(buffer, pos + 1).end()
+            self._pos = pos
+
+    def _drain(self, final: bool) -> list:
+        items = []
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                return items
+
+            char = self._buffer[self._pos]
+            if self._state == "start":
+                if char != "[":
+                    raise json.JSONDecodeError("Expecting '[' at top level", self._buffer, self._pos)
+                self._pos += 1
+                self._state = "first"
+            elif self._state in ("first", "item"):
+                if self._state == "first" and char == "]":
+                    self._pos += 1
+                    self._state = "end"
+                    continue
+                try:
+                    item, end = self._decoder.raw_decode(self._buffer, self._pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    return items  # 元素尚未读完整 等待下一个文本块
+                # 数字/字面量可能被截断（例如"2."只解析出2）：看到其后的分隔符才确认完整
+                if not final and self._buffer[end - 1] not in '}]"' and (
+                        end == len(self._buffer) or self._buffer[end] not in self._DELIMITERS):
+                    return items
+                items.append(item)
+                if self.track_offsets:
+                    self._mark_bytes += len(self._buffer[self._mark:end].encode("utf-8"))
+                    self._mark = end
+                    self.item_ends.append(self._mark_bytes)
+                self._pos = end
+                self._state = "sep"
+            elif self._state == "sep":
+                if char == ",":
+                    self._state = "item"
+                elif char == "]":
+                    self._state = "end"
+                else:
+                    raise json.JSONDecodeError("Expecting ',' delimiter", self._buffer, self._pos)
+                self._pos += 1
+            else:
+                raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+
+
+# ================= JSON Lines 格式 =================
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')  # 按行存储事件的脚本后缀
+
+
+def is_jsonl_path(path: Union[str, PathLike[str]]) -> bool:
+    """根据后缀判断是否为JSON Lines格式的脚本"""
+    return os.path.splitext(str(path))[1].lower() in JSONL_SUFFIXES
+
+
+def _dump_line(raw_event: Dict) -> str:
+    """将单个事件序列化为一行（不含换行符）"""
+    return json.dumps(raw_event, ensure_ascii=False, separators=(",", ":"))
+
+
+async def append_events(path: str, events) -> int:
+    """以追加方式写入JSON Lines脚本（录制时无需重写整个文件）
+
+    :param path: .jsonl文件路径（不存在时自动创建）
+    :param events: 原始事件字典的可迭代对象（包含type字段）
+    :return: 写入后的文件字节长度 可作为下次续读的偏移量
+    """
+    lines = "".join(f"{_dump_line(raw_event)}\n" for raw_event in events)
+    async with aiofiles.open(path, 'ab') as f:
+        await f.write(lines.encode("utf-8"))
+        return await f.tell()
+
+
+def _decode_last_line(line: Union[str, bytes]) -> Optional[Any]:
+    """解析没有换行结尾的最后一行：语法完整时返回解析结果，空行或写了一半（无法解析）时返回None"""
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def iter_script(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Generator[Dict, None, None]:
+    """同步流式读取脚本中的原始事件（支持JSON数组与JSON Lines，用于离线处理）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if is_jsonl_path(path):
+            for line in f:
+                if not line.endswith("\n"):
+                    # 与stream_events一致：没有换行的最后一行只在语法完整时产出
+                    raw = _decode_last_line(line)
+                    if raw is not None:
+                        yield raw
+                    return
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        parser = JSONArrayStreamParser()
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield from parser.feed(chunk)
+        yield from parser.close()
+
+
+def write_script(dst: str, raw_events: Iterable[Dict]) -> int:
+    """把原始事件逐个写入脚本文件（格式由dst的后缀决定：JSON Lines或JSON数组）
+
+    :return: 写入的事件数量
+    """
+    count = 0
+    with open(dst, 'w', encoding='utf-8') as fout:
+        to_jsonl = is_jsonl_path(dst)
+        if not to_jsonl:
+            fout.write("[\n")
+        for raw_event in raw_events:
+            if to_jsonl:
+                fout.write(f"{_dump_line(raw_event)}\n")
+            else:
+                if count:
+                    fout.write(",\n")
+                fout.write(f"    {json.dumps(raw_event, ensure_ascii=False)}")
+            count += 1
+        if not to_jsonl:
+            fout.write("\n]\n")
+    return count
+
+
+def convert_script(src: str, dst: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """在JSON数组格式与JSON Lines格式之间转换脚本
+
+    转换方向由dst的后缀决定，两端都按流式处理，不会整体载入内存
+
+    :return: 转换的事件数量
+    """
+    return write_script(dst, iter_script(src, chunk_size))
+
+
+# ================= 事件缓存 =================
+DEFAULT_CACHE_MAX_EVENTS = 10_000  # 默认最多缓存的事件数量
+
+
+def _estimate_event_size(event: Dict) -> int:
+    """粗略估算标准化事件占用的字节数（只统计一层 避免深度遍历）"""
+    data = event["data"]
+    size = sys.getsizeof(event) + sys.getsizeof(data) + sys.getsizeof(event["event_type"])
+    for key, value in data.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class EventCache:
+    """有界的事件环形缓存
+
+    - 按数量（max_events）和估算字节数（max_bytes）限制缓存大小
+    - 超出限制时淘汰最旧的事件，可选追加写入spill_path（JSON Lines格式，可直接用load_events重放）
+    - recent(n)只访问最新的n个事件，不复制整个缓存
+    - 支持len/迭代/下标读取（cache[-1]等），兼容接收deque的旧钩子
+    """
+
+    SPILL_BATCH = 256  # 被淘汰的事件攒够该数量后再写入磁盘
+
+    def __init__(self, max_events: Optional[int] = DEFAULT_CACHE_MAX_EVENTS,
+                 max_bytes: Optional[int] = None, spill_path: Optional[str] = None):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.spill_path = spill_path
+        self._events: Deque = deque()
+        self._sizes: Deque = deque()  # 与_events一一对应的估算大小（仅在限制字节数时使用）
+        self._bytes = 0
+        self._spill_buffer = []
+        self.evicted = 0  # 累计淘汰的事件数
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def __reversed__(self):
+        return reversed(self._events)
+
+    def __getitem__(self, index: int) -> Dict:
+        """按下标读取（与deque相同，不支持切片）"""
+        return self._events[index]
+
+    @property
+    def approx_bytes(self) -> int:
+        """当前缓存的估算字节数（未设置max_bytes时为0）"""
+        return self._bytes
+
+    def append(self, event: Dict):
+        """存入事件，必要时淘汰最旧的事件"""
+        self._events.append(event)
+        if self.max_bytes is not None:
+            size = _estimate_event_size(event)
+            self._sizes.append(size)
+            self._bytes += size
+
+        while self._events and (
+                (self.max_events is not None and len(self._events) > self.max_events)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            self._evict()
+
+    def recent(self, n: int) -> list:
+        """返回最新的n个事件（从新到旧）"""
+        return list(islice(reversed(self._events), n))
+
+    def clear(self):
+        """清空缓存（被清空的事件同样会写入spill文件）"""
+        while self._events:
+            self._evict()
+        self.flush_spill()
+
+    def flush_spill(self):
+        """把待写入的淘汰事件追加到spill文件"""
+        if not self._spill_buffer:
+            return
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write("".join(self._spill_buffer))
+        self._spill_buffer.clear()
+
+    def _evict(self):
+        event = self._events.popleft()
+        if self.max_bytes is not None:
+            self._bytes -= self._sizes.popleft()
+        self.evicted += 1
+        if self.spill_path:
+            # 还原为原始事件格式 方便直接重放
+            self._spill_buffer.append(f"{_dump_line({'type': event['event_type'], **event['data']})}\n")
+            if len(self._spill_buffer) >= self.SPILL_BATCH:
+                self.flush_spill()
+
+
+# ================= 批量钩子 =================
+class BatchHook:
+    """按批次接收新事件的钩子
+
+    - 攒够batch_size个事件或第一个事件等待超过max_delay秒时投递一批
+    - 每批在独立任务中执行（同步函数放入线程池），不阻塞事件流；
+      同一钩子的各批次按顺序执行
+    - 记录调用次数与耗时，用于定位开销大的钩子
+    """
+
+    def __init__(self, callback: Callable, batch_size: int = 100, max_delay: float = 0.1):
+        if not callable(callback):
+            raise TypeError("钩子必须为可调用对象")
+        self.callback = callback
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_task: Optional[asyncio.Task] = None
+        # 统计数据
+        self.calls = 0
+        self.events = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, event: Dict):
+        """加入一个新事件，满足条件时投递"""
+        self._pending.append(event)
+        if len(self._pending) >= self.batch_size:
+            self.dispatch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self.dispatch)
+
+    def dispatch(self):
+        """立即投递当前攒下的事件"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch = tuple(self._pending)
+        self._pending = []
+        self._last_task = asyncio.get_running_loop().create_task(self._deliver(batch, self._last_task))
+
+    async def wait_idle(self):
+        """等待已投递的批次全部执行完"""
+        if self._last_task is not None:
+            await asyncio.wait((self._last_task,))
+
+    async def _deliver(self, batch: tuple, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            await asyncio.wait((previous,))  # 保证同一钩子的批次顺序
+        start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(self.callback):
+                await self.callback(batch)
+            else:
+                await asyncio.get_running_loop().run_in_executor(None, self.callback, batch)
+        except Exception as e:
+            self.errors += 1
+            print(f"[Error] Error executing hook {self.name}: {str(e)}")
+        finally:
+            elapsed = time.perf_counter() - start
+            self.calls += 1
+            self.events += len(batch)
+            self.total_time += elapsed
+            if elapsed > self.max_time:
+                self.max_time = elapsed
+
+    def report(self) -> Dict[str, Any]:
+        """返回该钩子的耗时统计"""
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "events": self.events,
+            "errors": self.errors,
+            "total_time": self.total_time,
+            "avg_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+        }
+
+
 # ================= 内置静态功能 =================
-def _process_raw_event(raw: Dict) -> Dict:
-    """统一事件处理逻辑（静态方法优化）"""
+def _process_raw_event(raw: Dict, reuse: bool = False) -> Dict:
+    """统一事件处理逻辑（静态方法优化）
+
+    :param reuse: 直接取出type字段并复用raw作为data（raw必须是调用方独占的字典，
+                  例如刚解析出的JSON对象），避免为每个事件复制一份data
+    """
     if "type" not in raw:
         raise ValueError("Missing required 'type' field in event")
 
+    if reuse:
+        event_type = raw.pop("type")
+        data = raw
+    else:
+        event_type = raw["type"]
+        data = {k: v for k, v in raw.items() if k != "type"}
+
     return {
-        "event_type": raw["type"],
-        "data": {k: v for k, v in raw.items() if k != "type"}
+        "event_type": sys.intern(event_type) if type(event_type) is str else event_type,  # 相同类型共享字符串
+        "data": data
     }
 
 
@@ -334,72 +950,158 @@ _json_processor_instance = None  # 暂时不需要直接创建实例
 
 # ================= 解析器类 =================
 class JSONEventProcessor:
-    def __init__(self):
+    def __init__(self, cache_max_events: Optional[int] = DEFAULT_CACHE_MAX_EVENTS,
+                 cache_max_bytes: Optional[int] = None, spill_path: Optional[str] = None):
+        """
+        :param cache_max_events: 最多缓存的事件数量（None为不限制）
+        :param cache_max_bytes: 缓存的估算字节上限（None为不限制）
+        :param spill_path: 被淘汰事件的追加写入路径（None为直接丢弃）
+        """
         self._file_lock = asyncio.Lock()
-        self._event_cache: Deque = deque()
+        self._event_cache = EventCache(cache_max_events, cache_max_bytes, spill_path)
         self._hooks = []
+        self._batch_hooks = []
         self._active = True
-
-    async def stream_events(self, path: str) -> AsyncGenerator[Dict[str, Any], None]:
+        self._resume_event = asyncio.Event()  # 未暂停时为set状态 暂停的流在此等待
+        self._resume_event.set()
+        self._offset = 0  # 最近产出的事件结束处的字节偏移
+
+    async def stream_events(
+            self,
+            path: str,
+            streaming: bool = True,
+            chunk_size: int = DEFAULT_CHUNK_SIZE,
+            offset: int = 0
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         """核心流式事件生成方法
 
         Args:
-            path: JSON文件路径
+            path: JSON文件路径（.jsonl/.ndjson按行读取）
+            streaming: 是否按块增量解析（False时整体读取后再解析）
+            chunk_size: 增量解析时每次读取的字符数
+            offset: 起始字节偏移（用于续读，取自current_offset；JSON数组脚本需要streaming=True）
 
         Yields:
             标准化事件字典（包含event_type和data两个键）
 
         功能特点：
             - 异步文件锁保证文件读取原子性
+            - 增量解析顶层数组 首个事件无需等待整个文件读取
             - 自动转换原始JSON事件结构
-            - 实时缓存和钩子触发
+            - 实时缓存和钩子触发（批量钩子按批次投递新事件）
             - 支持流暂停/恢复控制
         """
         # 使用异步锁确保同一时间只有一个协程读取文件
         async with self._file_lock:  # 🔒 防止多个消费者同时读取文件
 
-            # 异步打开文件（使用aiofiles实现真正的异步IO）
-            async with aiofiles.open(path, 'r') as f:  # 📂 非阻塞文件操作
-
-                # 加载并解析JSON数据
-                raw_data = json.loads(await f.read())  # ⏳ 异步等待文件读取完成
-
-                # 遍历原始事件数据
-                for raw_event in raw_data:  # 🔄 逐个处理事件
-
-                    # 检查流控制状态
-                    if not self._active:  # ⏸️ 暂停状态检测
-                        await self._wait_for_resume()  # ⏳ 等待恢复
-
-                    # 处理原始事件格式
-                    processed = self._process_raw_event(raw_event)  # 🛠️ 标准化转换
-                    if not processed:
-                        continue
-
-                    # 生成事件（核心产出点）
-                    yield processed  # 🚀 产出事件到调用方
+            # 按格式选择读取方式
+            jsonl = is_jsonl_path(path)
+            if jsonl:
+                opener = aiofiles.open(path, 'rb')
+            else:
+                # newline=''：保留原始换行符（\r\n不转换为\n），记录的字节偏移与文件一致
+                opener = aiofiles.open(path, 'r', encoding='utf-8', newline='')
 
-                    # 更新缓存并触发钩子
-                    self._event_cache.append(processed)  # 💾 存入缓存
-                    await self._trigger_hooks()  # 📡 通知所有监听者
+            # 异步打开文件（使用aiofiles实现真正的异步IO）
+            async with opener as f:  # 📂 非阻塞文件操作
+                if jsonl:
+                    raw_events = self._read_jsonl_events(f, offset)
+                else:
+                    raw_events = self._read_raw_events(f, streaming, chunk_size, offset)
+
+                try:
+                    # 遍历原始事件数据
+                    while True:  # 🔄 逐个处理事件
+
+                        # 检查流控制状态（在读取下一个事件之前 暂停期间不再读取文件）
+                        if not self._active:  # ⏸️ 暂停状态检测
+                            await self._wait_for_resume()  # ⏳ 等待恢复
+
+                        try:
+                            raw_event = await raw_events.__anext__()
+                        except StopAsyncIteration:
+                            break
+
+                        # 处理原始事件格式
+                        processed = self._process_raw_event(raw_event, reuse=True)  # 🛠️ 标准化转换（复用解析出的字典）
+                        if not processed:
+                            continue
+
+                        # 生成事件（核心产出点）
+                        yield processed  # 🚀 产出事件到调用方
+
+                        # 更新缓存并触发钩子
+                        self._event_cache.append(processed)  # 💾 存入缓存
+                        for hook in self._batch_hooks:  # 📦 批量钩子只接收新事件
+                            hook.add(processed)
+                        if self._hooks:
+                            await self._trigger_hooks()  # 📡 通知所有监听者
+                finally:
+                    await raw_events.aclose()
+                    # 流结束（或被提前关闭）时投递剩余的批次 并写入尚未写入的淘汰事件
+                    for hook in self._batch_hooks:
+                        hook.dispatch()
+                    self._event_cache.flush_spill()
+
+    async def _read_raw_events(self, f, streaming: bool, chunk_size: int, offset: int = 0) -> AsyncGenerator[Dict, None]:
+        """从已打开的文件中读取原始事件（增量解析时同时记录每个元素结束处的字节偏移）"""
+        if not streaming:
+            if offset:
+                raise ValueError("从偏移处续读JSON数组脚本需要streaming=True")
+            # 整体读取模式（旧路径 保留用于对比和小文件）
+            for raw_event in json.loads(await f.read()):
+                yield raw_event
+            return
+
+        if offset:
+            await f.seek(offset)  # 偏移总是位于某个元素之后 是完整字符的边界
+        self._offset = offset
+        parser = JSONArrayStreamParser(track_offsets=True, offset=offset)
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            for raw_event, end in zip(parser.feed(chunk), parser.item_ends):
+                self._offset = end
+                yield raw_event
+        for raw_event, end in zip(parser.close(), parser.item_ends):
+            self._offset = end
+            yield raw_event
+
+    async def _read_jsonl_events(self, f, offset: int) -> AsyncGenerator[Dict, None]:
+        """逐行读取JSON Lines脚本 并记录已读取的字节偏移"""
+        if offset:
+            await f.seek(offset)
+        self._offset = offset
+        while True:
+            line = await f.readline()
+            if not line.endswith(b"\n"):
+                # 没有换行结尾的最后一行：语法完整时照常产出，无法解析时视为录制器尚未写完的半行 留给下次续读
+                raw = _decode_last_line(line)
+                if raw is not None:
+                    self._offset += len(line)
+                    yield raw
+                break
+            self._offset += len(line)
+            if line.strip():
+                yield json.loads(line)
 
     # ================= 内置功能 =================
     @staticmethod
-    def _process_raw_event(raw: Dict) -> Dict:
+    def _process_raw_event(raw: Dict, reuse: bool = False) -> Dict:
         """统一事件处理逻辑"""
-        if "type" not in raw:
-            raise ValueError("Missing required 'type' field in event")
-
-        return {
-            "event_type": raw["type"],
-            "data": {k: v for k, v in raw.items() if k != "type"}
-        }
+        return _process_raw_event(raw, reuse)
 
     @property
     def is_active(self) -> bool:
         """流状态访问接口"""
         return self._active
 
+    @property
+    def current_offset(self) -> int:
+        """最近产出的事件结束处的字节偏移（可传给offset参数续读）"""
+        return self._offset
+
     @property
     def list_events(self) -> list:
         """安全访问缓存副本"""
@@ -415,6 +1117,19 @@ class JSONEventProcessor:
         """返回不可修改的缓存副本"""
         return tuple(self._event_cache)
 
+    def recent_events(self, n: int = 10) -> list:
+        """返回最新的n个事件（从新到旧，不复制整个缓存）"""
+        return self._event_cache.recent(n)
+
+    def configure_cache(self, max_events: Optional[int] = DEFAULT_CACHE_MAX_EVENTS,
+                        max_bytes: Optional[int] = None, spill_path: Optional[str] = None):
+        """重新设置缓存限制（已缓存的事件会按新限制保留）"""
+        old_cache = self._event_cache
+        old_cache.flush_spill()
+        self._event_cache = EventCache(max_events, max_bytes, spill_path)
+        for event in old_cache:
+            self._event_cache.append(event)
+
     # ================= 扩展控制接口 =================
     def register_hook(self, callback: Callable):
         """注册钩子函数的参数验证"""
@@ -422,22 +1137,56 @@ class JSONEventProcessor:
             raise TypeError("钩子必须为可调用对象")
         self._hooks.append(callback)
 
+    def register_batch_hook(self, callback: Callable, batch_size: int = 100,
+                            max_delay: float = 0.1) -> BatchHook:
+        """注册批量钩子：callback每次接收一个新事件元组，而不是整个缓存
+
+        :param batch_size: 每批最多包含的事件数
+        :param max_delay: 第一个事件最多等待的秒数
+        """
+        hook = BatchHook(callback, batch_size, max_delay)
+        self._batch_hooks.append(hook)
+        return hook
+
+    async def flush_hooks(self):
+        """立即投递所有未满的批次并等待执行完成"""
+        for hook in self._batch_hooks:
+            hook.dispatch()
+        for hook in self._batch_hooks:
+            await hook.wait_idle()
+
+    def hook_report(self) -> list:
+        """各批量钩子的耗时统计（按总耗时从高到低）"""
+        return sorted((hook.report() for hook in self._batch_hooks),
+                      key=lambda item: item["total_time"], reverse=True)
+
     def clear_cache(self):
         """清空事件缓存"""
         self._event_cache.clear()
 
+    def flush_spill(self):
+        """把待写入的淘汰事件追加到spill文件"""
+        self._event_cache.flush_spill()
+
+    async def close(self):
+        """结束使用：投递剩余的批量钩子并等待执行完成，写入待写入的淘汰事件"""
+        await self.flush_hooks()
+        self.flush_spill()
+
     def pause_stream(self):
-        """暂停事件流（线程安全）
+        """暂停事件流
 
         效果：
-        - 立即停止后续事件产出
-        - 保持当前状态直到resume被调用
+        - 立即停止后续事件产出（不再从文件读取）
+        - 保持当前状态直到resume被调用，等待期间不占用CPU
         """
         self._active = False
+        self._resume_event.clear()
 
     def resume_stream(self):
-        """恢复事件流"""
+        """恢复事件流（唤醒正在等待的流）"""
         self._active = True
+        self._resume_event.set()
 
     async def _trigger_hooks(self):
         """触发已注册的钩子"""
@@ -448,7 +1197,8 @@ class JSONEventProcessor:
                 hook(self._event_cache)
 
     async def _wait_for_resume(self):
-        pass
+        """挂起直到resume_stream被调用"""
+        await self._resume_event.wait()
 
 
 # ================= 获取方式 =================
@@ -457,15 +1207,24 @@ def get_json_processor() -> JSONEventProcessor:
     global _json_processor_instance
     if not _json_processor_instance:
         _json_processor_instance = JSONEventProcessor()
+        atexit.register(_json_processor_instance.flush_spill)  # 进程退出时写入剩余的淘汰事件
     return _json_processor_instance
 
 
 # ================= 简化版API =================
-async def load_events(path: str) -> AsyncGenerator[Dict[str, Any], None]:
-    """简化的事件加载入口函数"""
+async def load_events(
+        path: str,
+        streaming: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        offset: int = 0
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """简化的事件加载入口函数（支持.json数组与.jsonl按行格式）"""
     processor = get_json_processor()
-    async for event in processor.stream_events(path):
-        yield event
+    # aclosing保证提前结束时立即释放文件锁 而不是等待垃圾回收
+    async with aclosing(processor.stream_events(path, streaming=streaming, chunk_size=chunk_size,
+                                                offset=offset)) as events:
+        async for event in events:
+            yield event
 
 
 # class LoggerOperator:
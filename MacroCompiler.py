@@ -0,0 +1,219 @@
+"""
+MacroCompiler.py
+把JSON事件脚本编译为紧凑的二进制宏文件，并通过mmap直接回放
+
+文件结构（小端序）：
+    文件头     magic/版本/记录数/命令数/字符串数/各表偏移
+    记录区     每个事件一条定长记录（命令序号、坐标、时长、附加数据序号）
+    命令表     去重后的命令名
+    字符串表   去重后的附加数据（其余字段的JSON文本）
+"""
+
+import json
+import mmap
+import struct
+import sys
+from typing import AsyncGenerator, Dict, Generator, List
+
+from EventActuator import Event
+from FilesIO import iter_script
+
+__all__ = ['compile_macro', 'MacroFile', 'load_macro', 'MACRO_SUFFIX']
+
+MACRO_SUFFIX = '.macro'  # 编译后文件的推荐后缀
+
+_MAGIC = b"SSMACRO1"
+_VERSION = 1
+_HEADER = struct.Struct("<8sHHIIIQQ")  # magic, version, reserved, 记录数, 命令数, 字符串数, 命令表偏移, 字符串表偏移
+_RECORD = struct.Struct("<HBBiidI")  # 命令序号, 标志位, 时长字段, x, y, 时长, 附加数据序号
+_OFFSET = struct.Struct("<Q")
+
+# 标志位
+_HAS_X = 0x01
+_HAS_Y = 0x02
+_TIME_INT = 0x04  # 时长原本是整数（回放时还原为int）
+# 时长字段（记录中的第三个字节）
+_TIME_KEYS = (None, "duration", "interval", "sleep")
+_NO_EXTRA = 0xFFFFFFFF
+
+_INT32_MIN, _INT32_MAX = -2 ** 31, 2 ** 31 - 1
+_EXACT_INT = 2 ** 53  # 能用double精确表示的整数范围
+
+
+def _fits_int32(value) -> bool:
+    return type(value) is int and _INT32_MIN <= value <= _INT32_MAX
+
+
+def _write_table(f, items: List[bytes]):
+    """写入 偏移数组 + 数据块（偏移相对于数据块起点，多一个结尾偏移便于计算长度）"""
+    position = 0
+    for item in items:
+        f.write(_OFFSET.pack(position))
+        position += len(item)
+    f.write(_OFFSET.pack(position))
+    for item in items:
+        f.write(item)
+
+
+# ================= 编译 =================
+def compile_macro(src: str, dst: str) -> int:
+    """
+    编译事件脚本（.json数组或.jsonl）为二进制宏文件
+
+    - x/y为32位整数时存入定长记录，duration/interval/sleep存为浮点时长（整数通过标志位还原为int）
+    - 其余字段序列化为JSON文本存入字符串表（相同内容只存一份）
+
+    :return: 编译的事件数量
+    """
+    commands: Dict[str, int] = {}
+    strings: Dict[str, int] = {}
+    count = 0
+
+    with open(dst, 'wb') as f:
+        f.write(b"\0" * _HEADER.size)  # 先占位 写完记录后回填
+
+        for raw_event in iter_script(src):
+            if "type" not in raw_event:
+                raise ValueError(f"Missing required 'type' field in event #{count}")
+            data = dict(raw_event)
+            command_id = commands.setdefault(data.pop("type"), len(commands))
+            if command_id > 0xFFFF:
+                raise ValueError("命令种类超过65535个，无法编译")
+
+            flags = 0
+            x = y = 0
+            if _fits_int32(data.get("x")):
+                x = data.pop("x")
+                flags |= _HAS_X
+            if _fits_int32(data.get("y")):
+                y = data.pop("y")
+                flags |= _HAS_Y
+
+            time_key = 0
+            seconds = 0.0
+            for index, key in enumerate(_TIME_KEYS[1:], start=1):
+                value = data.get(key)
+                if type(value) is float or (type(value) is int and -_EXACT_INT <= value <= _EXACT_INT):
+                    seconds = float(data.pop(key))
+                    time_key = index
+                    if type(value) is int:
+                        flags |= _TIME_INT
+                    break
+
+            extra = _NO_EXTRA
+            if data:
+                text = json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+                extra = strings.setdefault(text, len(strings))
+
+            f.write(_RECORD.pack(command_id, flags, time_key, x, y, seconds, extra))
+            count += 1
+
+        command_offset = f.tell()
+        _write_table(f, [name.encode("utf-8") for name in commands])
+        string_offset = f.tell()
+        _write_table(f, [text.encode("utf-8") for text in strings])
+
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, count, len(commands), len(strings),
+                             command_offset, string_offset))
+    return count
+
+
+# ================= 加载 =================
+class MacroFile:
+    """通过mmap访问的二进制宏文件
+
+    记录直接从映射内存中解析，不整体读入；附加数据按需解码并缓存
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件无法映射
+            self._file.close()
+            raise ValueError(f"无效的宏文件: {path}")
+
+        magic, version, _, count, n_commands, n_strings, command_offset, string_offset = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"无效的宏文件: {path}")
+
+        self._count = count
+        self._string_offset = string_offset
+        self._n_strings = n_strings
+        self.commands = [sys.intern(name.decode("utf-8"))
+                         for name in self._read_table(command_offset, n_commands)]
+        self._string_cache: Dict[int, Dict] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """释放映射和文件句柄"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _read_table(self, offset: int, count: int) -> List[bytes]:
+        blob = offset + (count + 1) * _OFFSET.size
+        offsets = [_OFFSET.unpack_from(self._mm, offset + i * _OFFSET.size)[0] for i in range(count + 1)]
+        return [self._mm[blob + offsets[i]:blob + offsets[i + 1]] for i in range(count)]
+
+    def _extra(self, index: int) -> Dict:
+        """按序号解码附加数据（相同内容只解码一次）"""
+        cached = self._string_cache.get(index)
+        if cached is None:
+            base = self._string_offset
+            start, end = struct.unpack_from("<QQ", self._mm, base + index * _OFFSET.size)
+            blob = base + (self._n_strings + 1) * _OFFSET.size
+            cached = json.loads(self._mm[blob + start:blob + end])
+            self._string_cache[index] = cached
+        return cached
+
+    def record(self, index: int) -> Event:
+        """读取第index个事件"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._build(_HEADER.size + index * _RECORD.size)
+
+    def _build(self, offset: int) -> Event:
+        command_id, flags, time_key, x, y, seconds, extra = _RECORD.unpack_from(self._mm, offset)
+        # 附加数据是共享缓存 每个事件拿到独立的副本（处理函数可能修改data）
+        data = dict(self._extra(extra)) if extra != _NO_EXTRA else {}
+        if flags & _HAS_X:
+            data["x"] = x
+        if flags & _HAS_Y:
+            data["y"] = y
+        if time_key:
+            data[_TIME_KEYS[time_key]] = int(seconds) if flags & _TIME_INT else seconds
+        return Event(self.commands[command_id], data)
+
+    def events(self, start: int = 0) -> Generator[Event, None, None]:
+        """按顺序产出事件（可从第start个开始）"""
+        record_size = _RECORD.size
+        offset = _HEADER.size + start * record_size
+        for _ in range(start, self._count):
+            yield self._build(offset)
+            offset += record_size
+
+    async def stream(self, start: int = 0) -> AsyncGenerator[Event, None]:
+        """异步产出事件，可直接传给Actuator.bind_generator"""
+        for event in self.events(start):
+            yield event
+
+
+async def load_macro(path: str, start: int = 0) -> AsyncGenerator[Event, None]:
+    """简化的宏文件加载入口（产出Event对象，结束时自动关闭文件）"""
+    with MacroFile(path) as macro:
+        async for event in macro.stream(start):
+            yield event
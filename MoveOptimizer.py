@@ -0,0 +1,266 @@
+"""
+MoveOptimizer.py
+合并连续的鼠标移动事件：把一段mouse_move路径简化为少数几个关键点，减少阻塞的moveTo调用
+
+用法：
+    # 实时事件流
+    optimizer = MoveOptimizer(tolerance=3.0)
+    actuator.bind_generator(optimizer.stream(bridge.event_emitter()))
+
+    # 离线处理脚本文件
+    report = optimize_script("saves/test/test.json", "saves/test/test.min.json", tolerance=3.0)
+    print(report)  # {'events': ..., 'written': ..., 'removed': ...}
+
+规则：
+- 只处理move_types中的事件，且同一段内的事件类型相同；点击、拖动、按键等事件原样保留在原来的位置，并把前后的移动分成不同的段
+- 每段的首尾两个点总是保留；被删除的移动事件的duration累加到下一个保留的事件上，回放总时长不变
+- method="rdp"：Ramer–Douglas–Peucker算法，删除偏离保留路径不超过tolerance像素的点
+- method="window"：时间窗口抽样，每window秒只保留最后一个点
+"""
+
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from EventActuator import Event
+from FilesIO import iter_script, write_script
+
+__all__ = ['MoveOptimizer', 'simplify_path', 'optimize_script']
+
+METHODS = ("rdp", "window")
+
+
+def _point(data) -> Optional[Tuple[float, float]]:
+    """读取事件坐标（缺少坐标的事件不参与合并）"""
+    if not isinstance(data, dict):
+        return None
+    x, y = data.get("x"), data.get("y")
+    if type(x) not in (int, float) or type(y) not in (int, float):
+        return None
+    return x, y
+
+
+def _duration(data: Dict) -> float:
+    value = data.get("duration", 0)
+    return value if type(value) in (int, float) else 0
+
+
+def _rdp(points: Sequence[Tuple[float, float]], tolerance: float) -> List[int]:
+    """Ramer–Douglas–Peucker：返回保留的点的序号（用栈代替递归，长路径不会超出递归深度）"""
+    last = len(points) - 1
+    keep = [False] * len(points)
+    keep[0] = keep[last] = True
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, last)]
+    while stack:
+        first, end = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[end]
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        farthest, max_distance_sq = -1, tolerance_sq
+        for index in range(first + 1, end):
+            px, py = points[index]
+            if length_sq == 0:  # 首尾重合时按到端点的距离计算
+                distance_sq = (px - x1) ** 2 + (py - y1) ** 2
+            else:
+                cross = dx * (py - y1) - dy * (px - x1)
+                distance_sq = cross * cross / length_sq
+            if distance_sq > max_distance_sq:
+                farthest, max_distance_sq = index, distance_sq
+        if farthest >= 0:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, end))
+    return [index for index, kept in enumerate(keep) if kept]
+
+
+def _window(times: Sequence[float], window: float) -> List[int]:
+    """时间窗口抽样：每个窗口保留最后一个点，并保留第一个点"""
+    kept = [0]
+    bucket_start = times[0]
+    for index in range(1, len(times)):
+        if times[index] - bucket_start >= window:
+            if kept[-1] != index - 1:
+                kept.append(index - 1)
+            bucket_start = times[index]
+    if kept[-1] != len(times) - 1:
+        kept.append(len(times) - 1)
+    return kept
+
+
+def simplify_path(points: Sequence[Tuple[float, float]],
+                  times: Optional[Sequence[float]] = None,
+                  method: str = "rdp",
+                  tolerance: float = 2.0,
+                  window: float = 0.05) -> List[int]:
+    """
+    简化一段鼠标路径
+    :param points: 按顺序排列的(x, y)坐标
+    :param times: 各点的时间（秒，window方式需要）
+    :return: 保留的点的序号（升序，总是包含首尾）
+    """
+    if len(points) <= 2:
+        return list(range(len(points)))
+    if method == "rdp":
+        return _rdp(points, tolerance)
+    if method == "window":
+        if times is None:
+            raise ValueError("window方式需要提供times")
+        return _window(times, window)
+    raise ValueError(f"method must be one of {METHODS}")
+
+
+class MoveOptimizer:
+    """鼠标移动合并器（removed/runs等计数在多次调用之间累计，可通过report查看）"""
+
+    def __init__(self,
+                 method: str = "rdp",
+                 tolerance: float = 2.0,
+                 window: float = 0.05,
+                 move_types: Iterable[str] = ("mouse_move", "mouse_move_abs"),
+                 max_run: int = 256,
+                 flush_delay: float = 0.05):
+        """
+        :param method: 简化方式 rdp / window
+        :param tolerance: rdp方式允许的偏差（像素）
+        :param window: window方式的窗口长度（秒）
+        :param move_types: 参与合并的事件类型
+        :param max_run: 实时模式下一段最多缓存的事件数（达到后立即简化并送出）
+        :param flush_delay: 实时模式下来源暂时没有新事件时，缓存的移动最多等待的秒数
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        self.method = method
+        self.tolerance = tolerance
+        self.window = window
+        self.move_types = frozenset(move_types)
+        self.max_run = max(2, max_run)
+        self.flush_delay = flush_delay
+        self.seen = 0  # 处理过的事件数
+        self.removed = 0  # 删除的移动事件数
+        self.runs = 0  # 简化过的移动段数
+
+    def report(self) -> Dict[str, int]:
+        """返回处理统计"""
+        return {"events": self.seen, "written": self.seen - self.removed,
+                "removed": self.removed, "runs": self.runs}
+
+    def _simplify(self, run: List[Tuple[str, Dict]], times: List[float]) -> List[Tuple[str, Dict]]:
+        """简化一段同类型的移动事件，返回保留的(类型, 数据)"""
+        self.runs += 1
+        kept = simplify_path([_point(data) for _, data in run], times,
+                             self.method, self.tolerance, self.window)
+        if len(kept) == len(run):
+            return run
+        self.removed += len(run) - len(kept)
+
+        result = []
+        previous = -1
+        for index in kept:
+            event_type, data = run[index]
+            # 被跳过的事件的duration并入保留的事件，保持回放总时长
+            skipped = sum(_duration(run[i][1]) for i in range(previous + 1, index))
+            if skipped:
+                data = dict(data)
+                data["duration"] = _duration(data) + skipped
+            result.append((event_type, data))
+            previous = index
+        return result
+
+    def _is_move(self, event_type: str, data) -> bool:
+        return event_type in self.move_types and _point(data) is not None
+
+    # ================= 离线处理 =================
+    def optimize(self, raw_events: Iterable[Dict]) -> Iterable[Dict]:
+        """处理脚本中的原始事件（{"type": ..., ...}），时间按duration累计"""
+        run: List[Tuple[str, Dict]] = []
+        times: List[float] = []
+        clock = 0.0
+        for raw_event in raw_events:
+            self.seen += 1
+            event_type = raw_event.get("type")
+            if run and (event_type != run[0][0] or not self._is_move(event_type, raw_event)):
+                for _, data in self._simplify(run, times):
+                    yield data
+                run, times = [], []
+            if self._is_move(event_type, raw_event):
+                run.append((event_type, raw_event))
+                times.append(clock)
+            else:
+                yield raw_event
+            clock += _duration(raw_event)
+        if run:
+            for _, data in self._simplify(run, times):
+                yield data
+
+    # ================= 实时处理 =================
+    async def stream(self, source: AsyncIterable[Any]) -> AsyncGenerator[Event, None]:
+        """
+        处理实时事件流（产出Event或load_events的字典），可直接传给Actuator.bind_generator
+        时间使用事件到达的时间；移动事件最多缓存max_run个或flush_delay秒
+        """
+        loop = asyncio.get_running_loop()
+        iterator = source.__aiter__()
+        run: List[Tuple[str, Dict]] = []
+        times: List[float] = []
+        next_item: Optional[asyncio.Future] = None
+
+        def flush():
+            events = [Event(event_type, data) for event_type, data in self._simplify(run, times)]
+            run.clear()
+            times.clear()
+            return events
+
+        try:
+            while True:
+                if next_item is None:
+                    next_item = asyncio.ensure_future(iterator.__anext__())
+                if run:
+                    # 有缓存的移动时限时等待 来源停顿时先把已有的移动送出（不取消正在读取的事件）
+                    done, _ = await asyncio.wait({next_item}, timeout=self.flush_delay)
+                    if not done:
+                        for event in flush():
+                            yield event
+                        continue
+                try:
+                    item = await next_item
+                except StopAsyncIteration:
+                    break
+                next_item = None
+
+                if isinstance(item, dict):  # load_events产出的字典
+                    item = Event(item["event_type"], item["data"])
+                self.seen += 1
+                is_move = self._is_move(item.type, item.data)
+                if run and (not is_move or item.type != run[0][0]):
+                    for event in flush():
+                        yield event
+                if is_move:
+                    run.append((item.type, item.data))
+                    times.append(loop.time())
+                    if len(run) >= self.max_run:
+                        for event in flush():
+                            yield event
+                else:
+                    yield item
+            if run:
+                for event in flush():
+                    yield event
+        finally:
+            if next_item is not None and not next_item.done():
+                # 先等待被取消的读取结束 来源才能正常关闭
+                next_item.cancel()
+                await asyncio.wait({next_item})
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+def optimize_script(src: str, dst: str, **options) -> Dict[str, int]:
+    """
+    离线简化脚本文件（支持.json数组与.jsonl，输出格式由dst后缀决定）
+    :param options: 传给MoveOptimizer的参数
+    :return: 处理统计 {'events', 'written', 'removed', 'runs'}
+    """
+    optimizer = MoveOptimizer(**options)
+    write_script(dst, optimizer.optimize(iter_script(src)))
+    return optimizer.report()
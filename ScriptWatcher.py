@@ -0,0 +1,252 @@
+"""
+ScriptWatcher.py
+监视目录中新增或修改的事件脚本，并把其中的事件送入执行器
+
+用法：
+    watcher = ScriptWatcher("saves/")
+    actuator.bind_generator(watcher.events())
+    await actuator.main_loop()
+
+Linux下通过inotify获取变化通知，其他平台使用基于get_files的定时轮询
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from contextlib import aclosing
+from typing import AsyncGenerator, Dict, Iterable, Tuple
+
+from EventActuator import Event
+from FilesIO import get_files, load_events
+
+__all__ = ['ScriptWatcher']
+
+# inotify常量（linux/inotify.h）
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_ISDIR = 0x40000000
+_IN_Q_OVERFLOW = 0x00004000
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """加载libc中的inotify函数，不可用时返回None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ScriptWatcher:
+    """事件脚本目录监视器
+
+    - 新增或修改的脚本在debounce秒内没有再次变化后才会被送出（合并连续写入）
+    - 默认只处理启动之后发生的变化，process_existing=True时先处理已有脚本
+    """
+
+    def __init__(self,
+                 directory: str,
+                 suffixes: Iterable[str] = ("json", "jsonl", "ndjson"),
+                 debounce: float = 0.5,
+                 poll_interval: float = 1.0,
+                 max_depth: int = 2,
+                 use_inotify: bool = True,
+                 process_existing: bool = False):
+        """
+        :param directory: 监视的目录（例如saves/）
+        :param suffixes: 视为事件脚本的后缀（不含点号）
+        :param debounce: 文件最后一次变化后等待的秒数
+        :param poll_interval: 轮询模式下两次扫描的间隔秒数
+        :param max_depth: 监视的目录层数（与get_files一致）
+        :param use_inotify: 是否在可用时使用inotify
+        :param process_existing: 是否把启动时已存在的脚本也送出
+        """
+        self.directory = os.path.abspath(directory)
+        self.suffixes = tuple(suffix.lstrip(".").lower() for suffix in suffixes)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_depth = max_depth
+        self.process_existing = process_existing
+        self._libc = _load_inotify() if use_inotify else None
+        self._pending: Dict[str, float] = {}  # 路径 → 可以送出的时间点
+        self._wakeup = asyncio.Event()  # 有新的变化时唤醒等待中的changes()
+        self._running = False
+
+    @property
+    def backend(self) -> str:
+        """当前使用的通知方式"""
+        return "inotify" if self._libc is not None else "polling"
+
+    def stop(self):
+        """停止监视（changes/events随后结束）"""
+        self._running = False
+        self._wakeup.set()
+
+    def _is_script(self, path: str) -> bool:
+        return os.path.splitext(path)[1].lstrip(".").lower() in self.suffixes
+
+    def _mark(self, path: str):
+        """记录一次变化（重复变化会推迟送出时间）"""
+        self._pending[path] = asyncio.get_running_loop().time() + self.debounce
+        self._wakeup.set()
+
+    # ================= 变化来源 =================
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """轮询模式：列出所有脚本及其(mtime, size)"""
+        snapshot = {}
+        for entry in get_files(self.directory, max_depth=self.max_depth):
+            if entry['suffix'] == 'folder':
+                continue
+            path = os.path.join(self.directory, entry['path'])
+            if not self._is_script(path):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def _poll(self):
+        """轮询模式：在线程中扫描目录，两次扫描之间休眠（不忙等）"""
+        previous = await asyncio.to_thread(self._scan)
+        if self.process_existing:
+            for path in previous:
+                self._mark(path)
+        while self._running:
+            await asyncio.sleep(self.poll_interval)
+            current = await asyncio.to_thread(self._scan)
+            for path, signature in current.items():
+                if previous.get(path) != signature:
+                    self._mark(path)
+            previous = current
+
+    async def _watch_inotify(self):
+        """inotify模式：通过事件循环的reader回调接收内核通知"""
+        libc = self._libc
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            # 初始化失败（例如达到实例上限）时退回轮询
+            self._libc = None
+            await self._poll()
+            return
+
+        watches: Dict[int, Tuple[str, int]] = {}  # wd → (目录, 深度)
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY | _IN_DELETE_SELF
+
+        def add_watch(path: str, depth: int):
+            wd = libc.inotify_add_watch(fd, os.fsencode(path), mask)
+            if wd >= 0:
+                watches[wd] = (path, depth)
+
+        def add_tree(path: str, depth: int):
+            add_watch(path, depth)
+            if depth >= self.max_depth:
+                return
+            for entry in get_files(path, max_depth=0):
+                if entry['suffix'] == 'folder':
+                    add_tree(os.path.join(path, entry['path']), depth + 1)
+
+        def on_readable():
+            try:
+                buffer = os.read(fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(buffer):
+                wd, event_mask, _, name_length = _INOTIFY_EVENT.unpack_from(buffer, offset)
+                offset += _INOTIFY_EVENT.size
+                name = buffer[offset:offset + name_length].rstrip(b"\0")
+                offset += name_length
+
+                if event_mask & _IN_Q_OVERFLOW:
+                    # 通知队列溢出 补一次全量扫描
+                    for path in self._scan():
+                        self._mark(path)
+                    continue
+                if wd not in watches:
+                    continue
+                directory, depth = watches[wd]
+                if event_mask & _IN_DELETE_SELF:
+                    del watches[wd]
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if event_mask & _IN_ISDIR:
+                    if event_mask & (_IN_CREATE | _IN_MOVED_TO) and depth < self.max_depth:
+                        add_tree(path, depth + 1)
+                elif self._is_script(path):
+                    self._mark(path)
+
+        loop = asyncio.get_running_loop()
+        add_tree(self.directory, 0)
+        if self.process_existing:
+            for path in await asyncio.to_thread(self._scan):
+                self._mark(path)
+        loop.add_reader(fd, on_readable)
+        try:
+            await loop.create_future()  # 通知由reader回调处理 这里只等待changes()结束时取消
+        finally:
+            loop.remove_reader(fd)
+            os.close(fd)
+
+    # ================= 对外接口 =================
+    async def changes(self) -> AsyncGenerator[str, None]:
+        """产出已稳定的新增/修改脚本路径"""
+        self._running = True
+        source = self._watch_inotify() if self._libc is not None else self._poll()
+        watcher_task = asyncio.create_task(source)
+        loop = asyncio.get_running_loop()
+        try:
+            while self._running:
+                if watcher_task.done() and watcher_task.exception():
+                    raise watcher_task.exception()
+
+                # 先清除唤醒标记再收集：送出路径期间（调用方处理时）发生的stop或变化不会丢失
+                self._wakeup.clear()
+                now = loop.time()
+                ready = sorted(path for path, deadline in self._pending.items() if deadline <= now)
+                for path in ready:
+                    del self._pending[path]
+                    if os.path.exists(path):
+                        yield path
+                        if not self._running:
+                            return
+
+                # 等待到最早的送出时间或下一次变化（无变化时一直休眠）
+                timeout = None
+                if self._pending:
+                    timeout = max(0.0, min(self._pending.values()) - loop.time())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._running = False
+            watcher_task.cancel()
+            try:
+                await watcher_task
+            except asyncio.CancelledError:
+                pass
+
+    async def events(self) -> AsyncGenerator[Event, None]:
+        """把变化的脚本中的事件依次送出，可直接传给Actuator.bind_generator"""
+        async with aclosing(self.changes()) as changed_paths:
+            async for path in changed_paths:
+                print(f"[Watcher] 检测到脚本: {path}")
+                try:
+                    async with aclosing(load_events(path)) as script_events:
+                        async for event_dict in script_events:
+                            yield Event(event_dict["event_type"], event_dict["data"])
+                except (ValueError, OSError) as e:  # JSON格式错误或文件在读取前被删除
+                    print(f"[Error] [Watcher] 脚本读取失败 {path}: {str(e)}")
@@ -0,0 +1,54 @@
+# 配置加载对比：每次重新解析 + 深拷贝合并 与 配置缓存 + 结构共享合并
+# 用法：python -m examples.benchmark_config_cache [次数]
+
+
+import copy
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+from file_manager.core.config_cache import ConfigCache, deep_update
+
+DEFAULT_CONFIG = Path(__file__).parent.parent / 'file_manager' / 'data' / 'default_config.yml'
+OVERRIDE = {"file_manager": {"channel": "debug"}}
+
+
+def legacy_update(target: dict, source: dict) -> dict:
+    """原有实现：先深拷贝整个目标字典"""
+    merged = copy.deepcopy(target)
+    for key, value in source.items():
+        if isinstance(value, dict) and key in merged and isinstance(merged[key], dict):
+            merged[key] = legacy_update(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def legacy(count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        with open(DEFAULT_CONFIG, encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+        legacy_update(config, OVERRIDE)
+    return time.perf_counter() - start
+
+
+def cached(count: int) -> float:
+    cache = ConfigCache(racy_window=0)
+    start = time.perf_counter()
+    for _ in range(count):
+        deep_update(cache.load(DEFAULT_CONFIG), OVERRIDE)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, func in (("重新解析+深拷贝", legacy), ("缓存+结构共享", cached)):
+        elapsed = func(count)
+        print(f"[{name}] {count} 次 | 耗时: {elapsed:.3f} s | 每次: {elapsed / count * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
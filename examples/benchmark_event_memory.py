@@ -0,0 +1,51 @@
+# 事件对象内存占用对比（普通类 + 复制data vs __slots__ + 复用原始字典）
+# 用法：python -m examples.benchmark_event_memory [事件数量]
+
+
+import json
+import sys
+import tracemalloc
+
+from EventActuator import Event
+from FilesIO import _process_raw_event
+
+
+class DictEvent:
+    """改造前的Event实现（每个实例带有__dict__）"""
+
+    def __init__(self, event_type, data):
+        self.type = event_type
+        self.data = data
+
+
+def build_raw_events(count: int) -> str:
+    """生成鼠标移动事件的JSON文本"""
+    return json.dumps([{"type": "mouse_move", "x": i % 1920, "y": i % 1080} for i in range(count)])
+
+
+def measure(text: str, event_cls, reuse: bool) -> float:
+    """返回每个事件占用的平均字节数（含解析出的原始字典）"""
+    tracemalloc.start()
+    raw_events = json.loads(text)
+    events = []
+    for raw in raw_events:
+        processed = _process_raw_event(raw, reuse=reuse)
+        events.append(event_cls(processed["event_type"], processed["data"]))
+    del processed, raw, raw_events  # 只保留事件本身仍引用的对象
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / len(events)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    text = build_raw_events(count)
+    before = measure(text, DictEvent, reuse=False)
+    after = measure(text, Event, reuse=True)
+    print(f"{count} 个事件")
+    print(f"[改造前] 普通类 + 复制data: {before:.1f} 字节/事件")
+    print(f"[改造后] __slots__ + 复用原始字典: {after:.1f} 字节/事件 ({after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# 预写日志开销对比：不记录 / 每个事件单独fsync / 成组fsync
+# 用法：python -m examples.benchmark_journal [事件数量]
+
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from EventActuator import Actuator, Event, EventJournal
+from FilesIO import load_events
+
+
+def write_script(path: str, count: int):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps({"type": "noop", "i": i}) + "\n")
+
+
+async def plain(script: str):
+    """不记录日志时的事件来源"""
+    async for item in load_events(script):
+        yield Event(item["event_type"], item["data"])
+
+
+async def run(script: str, journal_path, group_size: int = 64) -> dict:
+    actuator = Actuator()
+
+    async def noop(data):
+        await asyncio.sleep(0)  # 模拟会让出事件循环的命令
+
+    actuator.commands["noop"] = noop
+    journal = EventJournal(journal_path, group_size=group_size) if journal_path else None
+    if journal is not None:
+        actuator.bind_generator(journal.resume(script))
+    else:
+        actuator.bind_generator(plain(script))
+
+    start = time.perf_counter()
+    await actuator.main_loop(journal=journal)
+    if journal is not None:
+        await journal.close()
+    elapsed = time.perf_counter() - start
+    return {"elapsed": elapsed, "commits": journal.commits if journal is not None else 0}
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "script.jsonl")
+        write_script(script, count)
+
+        cases = [("不记录", None, 0), ("group_size=1", "single.journal", 1), ("成组fsync(64)", "group.journal", 64)]
+        for name, journal_name, group_size in cases:
+            journal_path = os.path.join(tmp, journal_name) if journal_name else None
+            result = await run(script, journal_path, group_size)
+            print(f"[{name}] {count} 个事件 | 耗时: {result['elapsed']:.3f} s | "
+                  f"吞吐: {count / result['elapsed']:.0f} 事件/s | fsync次数: {result['commits']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
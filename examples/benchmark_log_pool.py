@@ -0,0 +1,51 @@
+# 日志句柄池测试：同时写入大量日志文件时，不同句柄上限下的吞吐量与重新打开次数
+# 用法：python -m examples.benchmark_log_pool [日志文件数] [每个文件的行数]
+
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from EventActuator import Event, get_actuator
+_actuator_instance = get_actuator()  # 确保实例的获取
+
+from EventActuator.commands.LoggerInstructionLibrary import register_commands, configure_log_pool, log_file_pool
+register_commands()  # 确保注册额外命令
+
+
+async def measure(directory: str, files: int, lines: int, max_open: int) -> float:
+    """轮流向所有文件写入，返回每秒写入的行数"""
+    configure_log_pool(max_open)
+    paths = [os.path.join(directory, f"max{max_open}", f"log_{i}.log") for i in range(files)]
+
+    async def event_gen():
+        for path in paths:
+            # 较小的缓冲让批量写入频繁发生 从而反复触发句柄淘汰
+            yield Event("log_open", {"path": path, "max_buffer_bytes": 256})
+        for line in range(lines):
+            for path in paths:
+                yield Event("log_write", {"path": path, "content": f"[Event] {line:06d} " + "x" * 32})
+        yield Event("log_close", {"end_marker": ""})
+
+    _actuator_instance.bind_generator(event_gen())
+    start = time.perf_counter()
+    await _actuator_instance.main_loop()
+    return files * lines / (time.perf_counter() - start)
+
+
+async def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        for max_open in (16, 128, files):
+            before = log_file_pool.snapshot()
+            rate = await measure(tmp, files, lines, max_open)
+            after = log_file_pool.snapshot()
+            print(f"[上限 {max_open} 个句柄] {files} 个文件 | {rate:,.0f} 行/秒 | "
+                  f"重新打开 {after['reopens'] - before['reopens']:,} 次")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
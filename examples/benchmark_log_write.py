@@ -0,0 +1,42 @@
+# 日志写入策略的对比测试（逐行写入并刷新 vs 缓冲批量写入）
+# 用法：python -m examples.benchmark_log_write [行数]
+
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from EventActuator import Event, get_actuator
+_actuator_instance = get_actuator()  # 确保实例的获取
+
+from EventActuator.commands.LoggerInstructionLibrary import register_commands
+register_commands()  # 确保注册额外命令
+
+
+async def measure(path: str, lines: int, durability: str) -> float:
+    """返回写入lines行日志（含打开和关闭）的每秒行数"""
+    async def event_gen():
+        yield Event("log_open", {"path": path, "durability": durability})
+        for i in range(lines):
+            yield Event("log_write", {"path": path, "content": f"[Event] line {i}"})
+        yield Event("log_close", {"path": path, "end_marker": ""})
+
+    _actuator_instance.bind_generator(event_gen())
+    start = time.perf_counter()
+    await _actuator_instance.main_loop()
+    return lines / (time.perf_counter() - start)
+
+
+async def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        for durability in ("flush_each", "batched"):
+            path = os.path.join(tmp, f"{durability}.log")
+            rate = await measure(path, lines, durability)
+            print(f"[{durability}] {lines} 行 | {rate:,.0f} 行/秒 | 文件大小: {os.path.getsize(path)} 字节")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+# 二进制宏文件与JSON脚本的回放对比（启动耗时与吞吐量）
+# 用法：python -m examples.benchmark_macro [事件数量]
+
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from FilesIO import JSONEventProcessor
+from MacroCompiler import compile_macro, load_macro
+
+
+def write_sample_script(path: str, count: int):
+    """生成鼠标移动与点击交替的测试脚本"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([
+            {"type": "mouse_move", "x": i % 1920, "y": i % 1080} if i % 10 else
+            {"type": "mouse_click", "button": "left", "x": i % 1920, "y": i % 1080}
+            for i in range(count)
+        ], f)
+
+
+async def measure(source) -> dict:
+    """统计首个事件耗时与每秒事件数"""
+    first_event = None
+    count = 0
+    start = time.perf_counter()
+    async for _ in source:
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        count += 1
+    total = time.perf_counter() - start
+    return {"first_event": first_event or 0.0, "rate": count / total if total else 0.0}
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "bench.json")
+        macro_path = os.path.join(tmp, "bench.macro")
+        write_sample_script(json_path, count)
+
+        start = time.perf_counter()
+        compile_macro(json_path, macro_path)
+        print(f"编译耗时: {time.perf_counter() - start:.2f} s | "
+              f"JSON: {os.path.getsize(json_path) / 1024:.0f} KB -> 宏文件: {os.path.getsize(macro_path) / 1024:.0f} KB")
+
+        results = {
+            "load_events": await measure(JSONEventProcessor().stream_events(json_path)),
+            "load_macro": await measure(load_macro(macro_path)),
+        }
+        for label, result in results.items():
+            print(f"[{label}] 首个事件: {result['first_event'] * 1000:.2f} ms | "
+                  f"吞吐量: {result['rate']:,.0f} 事件/秒")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+# 鼠标移动合并效果：删除的事件数、处理速度，以及模拟moveTo耗时下的回放时间
+# 用法：python -m examples.benchmark_move_optimizer [脚本路径或事件数量] [容差像素]
+
+
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+from FilesIO import iter_script, write_script
+from MoveOptimizer import optimize_script
+
+MOVE_COST = 0.001  # 假设每次moveTo阻塞1毫秒
+
+
+def write_sample_recording(path: str, count: int):
+    """生成类似录制结果的脚本：带抖动的曲线移动，每隔一段插入点击与按键"""
+    random.seed(0)
+
+    def events():
+        for i in range(count):
+            if i % 500 == 499:
+                yield {"type": "mouse_click", "button": "left", "x": 100, "y": 100}
+                yield {"type": "key_press", "key": "a"}
+                continue
+            t = i / 80
+            yield {"type": "mouse_move",
+                   "x": int(960 + 600 * math.cos(t) + random.uniform(-1, 1)),
+                   "y": int(540 + 300 * math.sin(2 * t) + random.uniform(-1, 1)),
+                   "duration": 0.008}
+
+    write_script(path, events())
+
+
+def count_moves(path: str) -> int:
+    return sum(1 for event in iter_script(path) if event["type"] in ("mouse_move", "mouse_move_abs"))
+
+
+def main():
+    arg = sys.argv[1] if len(sys.argv) > 1 else "100000"
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    with tempfile.TemporaryDirectory() as tmp:
+        if os.path.exists(arg):
+            src = arg
+        else:
+            src = os.path.join(tmp, "recording.jsonl")
+            write_sample_recording(src, int(arg))
+
+        for method, options in (("rdp", {"tolerance": tolerance}), ("window", {"window": 0.05})):
+            dst = os.path.join(tmp, f"optimized_{method}.jsonl")
+            start = time.perf_counter()
+            report = optimize_script(src, dst, method=method, **options)
+            elapsed = time.perf_counter() - start
+            before, after = count_moves(src), count_moves(dst)
+            print(f"[{method}] 事件 {report['events']:,} -> {report['written']:,} | 删除 {report['removed']:,} | "
+                  f"处理速度 {report['events'] / elapsed:,.0f} 事件/秒 | "
+                  f"moveTo阻塞时间 {before * MOVE_COST:.1f} s -> {after * MOVE_COST:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# 回放计时精度对比：逐个asyncio.sleep累加 与 ReplayScheduler的绝对截止时间
+# 用法：python -m examples.benchmark_replay [事件数量] [间隔毫秒]
+
+
+import asyncio
+import sys
+import time
+
+from EventActuator import Event, ReplayScheduler
+
+
+def make_script(count: int, gap: float):
+    """生成鼠标移动脚本：每个移动事件之间插入一个sleep"""
+    for i in range(count):
+        yield {"event_type": "mouse_move", "data": {"x": i % 1920, "y": i % 1080}}
+        yield {"event_type": "sleep", "data": {"duration": gap}}
+
+
+async def as_source(items):
+    for item in items:
+        yield item
+
+
+async def chained_sleep(count: int, gap: float) -> float:
+    """原有方式：sleep命令依次执行，返回最终相对于计划时间的偏差"""
+    start = time.perf_counter()
+    for item in make_script(count, gap):
+        if item["event_type"] == "sleep":
+            await asyncio.sleep(item["data"]["duration"])
+        else:
+            Event(item["event_type"], item["data"])  # 模拟处理开销
+    return time.perf_counter() - start - count * gap
+
+
+async def scheduled(count: int, gap: float, speed: float = 1.0) -> dict:
+    scheduler = ReplayScheduler(as_source(make_script(count, gap)), speed=speed)
+    async for _ in scheduler.stream():
+        pass
+    return scheduler.stats.snapshot()
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    gap = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+
+    drift = await chained_sleep(count, gap)
+    print(f"[asyncio.sleep累加] 计划 {count * gap:.2f} s | 累计偏差: {drift * 1000:.1f} ms")
+
+    for speed in (1.0, 2.0):
+        result = await scheduled(count, gap, speed)
+        print(f"[ReplayScheduler {speed}x] 计划 {count * gap / speed:.2f} s | 实际 {result['elapsed']:.2f} s | "
+              f"平均误差: {result['avg_drift'] * 1000:.3f} ms | 最大误差: {result['max_drift'] * 1000:.3f} ms | "
+              f"最后一个事件: {result['last_drift'] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
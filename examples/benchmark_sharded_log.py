@@ -0,0 +1,48 @@
+# 多进程分片执行的扩展性测试（日志命令）
+# 用法：python -m examples.benchmark_sharded_log [日志文件数] [每个文件的行数]
+
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from EventActuator import Event, ShardedActuator
+
+SETUP = ["EventActuator.commands.LoggerInstructionLibrary:register_commands"]
+
+
+async def measure(directory: str, workers: int, files: int, lines: int) -> float:
+    """返回每秒处理的事件数（含进程启动与退出）"""
+    paths = [os.path.join(directory, f"w{workers}", f"log_{i}.log") for i in range(files)]
+
+    async def event_gen():
+        for path in paths:
+            yield Event("log_open", {"path": path})
+        for line in range(lines):
+            for path in paths:
+                yield Event("log_write", {"path": path, "content": f"[Event] {line:08d} " + "x" * 64})
+        for path in paths:
+            yield Event("log_close", {"path": path, "end_marker": ""})
+        yield Event("exit", {"end": f"{workers} workers done"})
+
+    sharded = ShardedActuator(workers=workers, setup=SETUP)
+    sharded.bind_generator(event_gen())
+    start = time.perf_counter()
+    await sharded.main_loop()
+    total = files * (lines + 2)
+    return total / (time.perf_counter() - start)
+
+
+async def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in (1, 2, 4, 8):
+            rate = await measure(tmp, workers, files, lines)
+            print(f"[{workers} 个进程] {rate:,.0f} 事件/秒")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+# 流式解析与整体解析的对比测试，以及跳过空白的方式（逐字符循环 / 编译正则）对吞吐量的影响
+# 用法：python -m examples.benchmark_stream_events [事件数量]
+
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import FilesIO
+from FilesIO import JSONArrayStreamParser, JSONEventProcessor
+
+
+class LoopWhitespaceParser(JSONArrayStreamParser):
+    """旧的跳过空白方式：逐字符循环（用于对比）"""
+
+    def _skip_whitespace(self):
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in self._WHITESPACE:
+            pos += 1
+        self._pos = pos
+
+
+def write_sample_script(path: str, count: int, indent=None):
+    """生成包含count个鼠标移动事件的测试脚本（indent不为None时整个数组按缩进格式化写入）"""
+    events = ({"type": "mouse_move", "x": i % 1920, "y": i % 1080} for i in range(count))
+    with open(path, "w", encoding="utf-8") as f:
+        if indent is not None:
+            json.dump(list(events), f, indent=indent)
+            return
+        f.write("[\n")
+        for i, event in enumerate(events):
+            if i:
+                f.write(",\n")
+            json.dump(event, f)
+        f.write("\n]\n")
+
+
+async def measure(path: str, streaming: bool) -> dict:
+    """统计首个事件耗时、总耗时和峰值内存"""
+    processor = JSONEventProcessor()
+    first_event = None
+    count = 0
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    async for _ in processor.stream_events(path, streaming=streaming):
+        if first_event is None:
+            first_event = time.perf_counter() - start
+        count += 1
+        processor.clear_cache()  # 只测量解析本身的内存
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"count": count, "first_event": first_event or 0.0, "total": total, "peak": peak}
+
+
+async def throughput(path: str, parser_class) -> float:
+    """使用指定的解析器流式读取整个脚本，返回端到端吞吐量（事件/秒，不统计内存）"""
+    original = FilesIO.JSONArrayStreamParser
+    FilesIO.JSONArrayStreamParser = parser_class
+    try:
+        processor = JSONEventProcessor(cache_max_events=0)
+        count = 0
+        start = time.perf_counter()
+        async for _ in processor.stream_events(path):
+            count += 1
+        return count / (time.perf_counter() - start)
+    finally:
+        FilesIO.JSONArrayStreamParser = original
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.json")
+        write_sample_script(path, count)
+        print(f"测试文件: {count} 个事件, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        for streaming in (False, True):
+            result = await measure(path, streaming)
+            label = "流式解析" if streaming else "整体解析"
+            print(f"[{label}] 首个事件: {result['first_event'] * 1000:.2f} ms | "
+                  f"总耗时: {result['total']:.2f} s | "
+                  f"峰值内存: {result['peak'] / 1024 / 1024:.2f} MB")
+
+        # 跳过空白的方式对端到端吞吐量的影响（格式化后的脚本空白更多）
+        for indent in (None, 4, 8):
+            write_sample_script(path, count, indent)
+            label = "紧凑" if indent is None else f"indent={indent}"
+            loop_rate = regex_rate = 0.0
+            for _ in range(5):  # 交替执行 取最好的一次 减少其他因素的干扰
+                loop_rate = max(loop_rate, await throughput(path, LoopWhitespaceParser))
+                regex_rate = max(regex_rate, await throughput(path, JSONArrayStreamParser))
+            print(f"[跳过空白 {label}] 逐字符循环: {loop_rate:.0f} 事件/s | "
+                  f"编译正则: {regex_rate:.0f} 事件/s | 变化: {(regex_rate / loop_rate - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
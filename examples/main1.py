@@ -2,6 +2,7 @@ import asyncio
 import os
 
 from EventActuator import Event, Actuator
+from EventActuator.commands.LoggerInstructionLibrary import set_log_hook_registry
 from file_manager.core.async_bridge import AsyncFileBridge
 from file_manager.core.config_engine import ConfigEngine
 from file_manager.hooks.registry import HookRegistry
@@ -25,6 +26,7 @@ async def main(sanitize_input=None, archive_logs=None):
     registry = HookRegistry()
     registry.register('pre_write', sanitize_input, priority=90)
     registry.register('post_rotate', archive_logs, priority=50)
+    set_log_hook_registry(registry)  # 日志轮转完成后触发post_rotate
 
     # 绑定到事件执行器
     async with file_bridge.lifecycle():
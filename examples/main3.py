@@ -5,6 +5,7 @@
 
 
 import asyncio
+from contextlib import aclosing
 from aioconsole import ainput
 from typing import Optional, AsyncGenerator
 from FilesIO import get_json_processor, load_events
@@ -12,6 +13,7 @@ from EventActuator import Event, get_actuator
 
 _actuator = get_actuator()
 _processor = get_json_processor()
+_run_task: Optional[asyncio.Task] = None  # 当前执行事件流的主循环任务
 
 # 导入基础命令库的库
 import EventActuator.commands.basic
@@ -54,7 +56,7 @@ quit                - 退出程序
 
             if action == "quit":
                 print("正在安全关闭...")
-                # await _actuator.shutdown()
+                await stop_current_run()
                 return
 
             elif action == "start":
@@ -88,23 +90,39 @@ quit                - 退出程序
             print(f"错误: {str(e)}")
 
 
+async def stop_current_run():
+    """停止正在执行的事件流（包括处于暂停状态的流）"""
+    global _run_task
+    if _run_task is None or _run_task.done():
+        return
+    _actuator.stop()
+    _run_task.cancel()
+    try:
+        await _run_task
+    except asyncio.CancelledError:
+        pass
+    _run_task = None
+
+
 async def handle_start(path: str, limit: Optional[int]):
-    if _processor.is_active:
+    global _run_task
+    if _run_task is not None and not _run_task.done():
         print("正在停止当前流...")
-        _processor.pause_stream()
+        await stop_current_run()
 
     async def controlled_gen():
         count = 0
-        async for event_dict in load_events(path):
-            if limit and count >= limit:
-                print(f"已达数量限制 {limit}")
-                _processor.pause_stream()
-                break
-            yield Event(event_dict["event_type"], event_dict["data"])
-            count += 1
+        async with aclosing(load_events(path)) as events:  # 停止时立即释放文件
+            async for event_dict in events:
+                if limit and count >= limit:
+                    print(f"已达数量限制 {limit}")
+                    break
+                yield Event(event_dict["event_type"], event_dict["data"])
+                count += 1
 
-    _actuator.bind_generator(controlled_gen())
     _processor.resume_stream()
+    _actuator.bind_generator(controlled_gen())
+    _run_task = asyncio.create_task(_actuator.main_loop())  # 暂停/恢复直接作用于这次执行
     print(f"已启动 {path}{f' 数量限制: {limit}' if limit else ''}")
 
 
@@ -114,9 +132,7 @@ def show_recent_events():
         return
 
     print("\n最近事件:")
-    for idx, event in enumerate(reversed(_processor.cached_events)):
-        if idx >= 10:
-            break
+    for idx, event in enumerate(_processor.recent_events(10)):
         print(f"[{_processor.cache_size - idx}] {event['event_type']}: {event['data']}")
 
 
@@ -124,11 +140,8 @@ async def main():
     # 初始化绑定空生成器
     _actuator.bind_generator(empty_generator())
 
-    # 启动命令处理和事件循环
-    await asyncio.gather(
-        _actuator.main_loop(),
-        command_handler()
-    )
+    # 启动命令处理（事件循环由start命令启动）
+    await command_handler()
 
 
 if __name__ == "__main__":
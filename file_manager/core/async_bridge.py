@@ -2,20 +2,22 @@
 
 
 import asyncio
-import copy
+import bisect
 import hashlib
 import json
 import os
+import platform
+import tempfile
+import time
+import uuid
 from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from datetime import time
 from pathlib import Path
-from sys import platform
-from typing import AsyncGenerator
-
-import yaml
+from types import MappingProxyType
+from typing import AsyncGenerator, Dict, List, Mapping, Optional, Sequence
 
 from EventActuator import Event
+from file_manager.core.config_cache import config_cache, deep_update
 from file_manager.core.config_engine import ConfigEngine
 
 
@@ -26,36 +28,279 @@ class FileEvent:
     timestamp: float = field(default_factory=time.time)
 
 
+class Histogram:
+    """固定分桶的直方图（counts[i]为不超过bounds[i]的数量，最后一个桶统计超出上限的数量）"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, int]:
+        """返回 {"<=上限": 数量, ..., ">最大上限": 数量}"""
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return dict(zip(labels, self.counts))
+
+
+class BridgeStats:
+    """批处理统计：批次大小与等待时间（批内最早的操作从入队到送出的毫秒数）"""
+
+    WAIT_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    def __init__(self, batch_size: int):
+        bounds, size = [], 1
+        while size < batch_size:
+            bounds.append(size)
+            size *= 2
+        bounds.append(batch_size)
+        self.batch_sizes = Histogram(bounds)
+        self.waits = Histogram(self.WAIT_BOUNDS_MS)
+        self.dropped = 0  # 因队列已满被丢弃的操作数（drop_oldest/drop_newest/sample）
+        self.spilled = 0  # 写入磁盘段的操作数
+        self.replayed = 0  # 从磁盘段读回队列的操作数
+        self.max_depth = 0  # 队列深度的峰值
+
+    def on_batch(self, size: int, wait_ms: float):
+        self.batch_sizes.observe(size)
+        self.waits.observe(wait_ms)
+
+    def snapshot(self) -> Dict[str, object]:
+        """返回当前统计数据的字典副本"""
+        batches = self.batch_sizes.total
+        return {
+            "batches": batches,
+            "operations": int(self.batch_sizes.sum),
+            "avg_batch_size": self.batch_sizes.sum / batches if batches else 0.0,
+            "avg_wait_ms": self.waits.sum / batches if batches else 0.0,
+            "batch_size_histogram": self.batch_sizes.snapshot(),
+            "wait_ms_histogram": self.waits.snapshot(),
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "max_depth": self.max_depth,
+        }
+
+
+class SpillSegment:
+    """追加写入的磁盘段（JSON Lines）
+
+    队列满时的操作按顺序追加写入，消费者追上后按顺序读回；全部读回后删除文件，下次溢出时重新创建
+    （创建时清空同名文件：上次会话异常退出时留下的记录不会被读回）
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending = 0  # 已写入但尚未读回的操作数
+        self._writer = None
+        self._reader = None
+
+    def append(self, op: FileEvent):
+        """追加一个操作（只写入文件缓冲，不等待磁盘）"""
+        if self._writer is None:
+            self._writer = open(self.path, 'w', encoding='utf-8')  # 读取从文件开头开始 不能保留旧内容
+        record = {'operation': op.operation, 'payload': op.payload, 'timestamp': op.timestamp}
+        self._writer.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.pending += 1
+
+    def read(self, limit: int) -> List[FileEvent]:
+        """按写入顺序读回最多limit个操作"""
+        if not self.pending or limit <= 0:
+            return []
+        self._writer.flush()
+        if self._reader is None:
+            self._reader = open(self.path, 'r', encoding='utf-8')
+        ops = []
+        while len(ops) < min(limit, self.pending):
+            record = json.loads(self._reader.readline())
+            ops.append(FileEvent(record['operation'], record['payload'], record['timestamp']))
+        self.pending -= len(ops)
+        if not self.pending:
+            self.close()
+        return ops
+
+    def close(self):
+        """关闭并删除磁盘段（尚未读回的操作一并丢弃）"""
+        for handle in (self._writer, self._reader):
+            if handle is not None:
+                handle.close()
+        self._writer = self._reader = None
+        self.pending = 0
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class AsyncFileBridge:
+    """文件操作到执行器事件的桥接
+
+    队列满时的处理方式由config['overflow']决定：
+    - block：等待队列有空位（默认，生产者会被慢速的执行器拖住）
+    - drop_oldest：丢弃队列中最旧的操作
+    - drop_newest：丢弃新的操作
+    - sample：每sample_every个溢出操作保留1个（替换最旧的操作），其余丢弃
+    - spill：写入spill_path磁盘段，消费者追上后按原顺序读回
+    除block外，emit_operation都不会等待
+    """
+
+    RATE_SMOOTHING = 0.3  # 到达速率的指数平滑系数
+    OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest", "sample", "spill")
+
     def __init__(self, actuator, config):
         self.actuator = actuator
-        self.config = config
-        self._event_queue = asyncio.Queue(maxsize=1000)
+        self._config = config
+        self._metadata: Optional[Mapping] = None  # 会话元数据缓存（配置重新加载时失效）
+        self._session_id = uuid.uuid4().hex  # 执行器没有session_id时使用
+        self._event_queue = asyncio.Queue(maxsize=config.get('queue_size', 1000))
         self._active = True
+        self._arrival_rate = 0.0  # 平滑后的到达速率（操作/秒）
+        self.stats = BridgeStats(config['batch_size'])
+
+        self.overflow = config.get('overflow', 'block')
+        if self.overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}")
+        self._sample_every = max(1, config.get('sample_every', 10))
+        self._overflow_count = 0  # sample策略下累计的溢出次数
+        self._spill = SpillSegment(config.get('spill_path') or
+                                   os.path.join(tempfile.gettempdir(), f"file_bridge_{self._session_id}.spill"))
+
+    @property
+    def queue_depth(self) -> int:
+        """内存队列中等待送出的操作数"""
+        return self._event_queue.qsize()
+
+    @property
+    def spill_depth(self) -> int:
+        """磁盘段中等待读回的操作数"""
+        return self._spill.pending
+
+    def snapshot(self) -> Dict[str, object]:
+        """批处理与队列统计"""
+        return {**self.stats.snapshot(), "queue_depth": self.queue_depth, "spill_depth": self.spill_depth}
+
+    @property
+    def config(self):
+        return self._config
+
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self._metadata = None
+
+    def reload_config(self, config) -> bool:
+        """重新加载配置，内容有变化时替换配置并使会话元数据失效，返回是否有变化"""
+        if config is self._config or config == self._config:  # 配置缓存对未变化的文件返回同一个对象
+            return False
+        self.config = config
+        return True
+
+    def _target_batch_size(self) -> int:
+        """根据到达速率决定本批目标大小：低负载时1个就送出（低延迟），高负载时接近batch_size（高吞吐）"""
+        expected = int(self._arrival_rate * self.config['flush_interval'])
+        return max(1, min(self.config['batch_size'], expected))
+
+    def _drain(self, batch: List[FileEvent]):
+        """不等待地取出队列中已有的操作（不超过batch_size）"""
+        queue = self._event_queue
+        limit = self.config['batch_size']
+        while len(batch) < limit and not queue.empty():
+            batch.append(queue.get_nowait())
+
+    async def _fill(self, batch: List[FileEvent], target: int):
+        """队列暂时为空时等待后续操作，直到达到目标大小（由调用方统一限时）"""
+        while len(batch) < target:
+            batch.append(await self._event_queue.get())
+            self._drain(batch)
 
     async def event_emitter(self) -> AsyncGenerator[Event, None]:
-        while self._active or not self._event_queue.empty():
-            batch = []
-            try:
-                while len(batch) < self.config['batch_size']:
-                    batch.append(await asyncio.wait_for(
-                        self._event_queue.get(),
-                        timeout=self.config['flush_interval']
-                    ))
-            except asyncio.TimeoutError:
-                pass
-
-            if batch:
-                yield Event(
-                    event_type=self.config['channel'],
-                    data={
-                        'operations': batch,
-                        'metadata': self._collect_metadata()
-                    }
-                )
+        """
+        批量送出操作：
+        1. 等待第一个操作（空闲时每flush_interval检查一次是否已停止）
+        2. 不等待地取出队列中已有的操作
+        3. 未达到目标大小（按到达速率调整）时在同一个截止时间内继续等待（每批只有一个计时器）
+        """
+        queue = self._event_queue
+        loop = asyncio.get_running_loop()
+        last_batch_at = loop.time()
+
+        while self._active or not queue.empty() or self._spill.pending:
+            flush_interval = self.config['flush_interval']  # 每批读取 重新加载配置后立即生效
+            self._replay_spill()
+            if queue.empty():
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=flush_interval)
+                except asyncio.TimeoutError:
+                    continue
+            else:
+                first = queue.get_nowait()
+            deadline = loop.time() + flush_interval
+
+            batch = [first]
+            self._drain(batch)
+            target = self._target_batch_size()
+            if len(batch) < target and self._active and not self._spill.pending:
+                try:
+                    await asyncio.wait_for(self._fill(batch, target), timeout=deadline - loop.time())
+                except asyncio.TimeoutError:
+                    pass
+
+            # 更新到达速率估计（本批数量 / 距上一批的时间）
+            now = loop.time()
+            rate = len(batch) / max(now - last_batch_at, 1e-6)
+            self._arrival_rate += self.RATE_SMOOTHING * (rate - self._arrival_rate)
+            last_batch_at = now
+            self.stats.on_batch(len(batch), (time.time() - batch[0].timestamp) * 1000)
+
+            yield Event(
+                event_type=self.config['channel'],
+                data={
+                    'operations': batch,
+                    'metadata': self._collect_metadata()
+                }
+            )
+
+    def _replay_spill(self):
+        """队列降到一半以下时，把磁盘段中的操作按顺序读回队列"""
+        queue = self._event_queue
+        if self._spill.pending and queue.qsize() <= queue.maxsize // 2:
+            ops = self._spill.read(queue.maxsize - queue.qsize())
+            for op in ops:
+                queue.put_nowait(op)
+            self.stats.replayed += len(ops)
 
     async def emit_operation(self, op: str, payload: dict):
-        await self._event_queue.put(FileEvent(op, payload))
+        """提交一个文件操作，队列已满时按overflow策略处理"""
+        queue = self._event_queue
+        event = FileEvent(op, payload)
+        policy = self.overflow
+
+        if policy == "spill" and self._spill.pending:
+            # 磁盘段中还有未读回的操作时继续写入磁盘 保持先后顺序
+            self._spill.append(event)
+            self.stats.spilled += 1
+        elif not queue.full() or policy == "block":
+            await queue.put(event)
+        elif policy == "spill":
+            self._spill.append(event)
+            self.stats.spilled += 1
+        elif policy == "drop_newest":
+            self.stats.dropped += 1
+        else:
+            self._overflow_count += 1
+            if policy == "sample" and self._overflow_count % self._sample_every:
+                self.stats.dropped += 1
+                return
+            queue.get_nowait()  # drop_oldest / sample：腾出最旧的位置
+            queue.put_nowait(event)
+            self.stats.dropped += 1
+
+        depth = queue.qsize()
+        if depth > self.stats.max_depth:
+            self.stats.max_depth = depth
 
     @asynccontextmanager
     async def lifecycle(self):
@@ -65,55 +310,19 @@ class AsyncFileBridge:
         finally:
             await self._flush_remaining()
 
-    def _collect_metadata(self):
-        return {
-            'session_id': self.actuator.session_id,
-            'host': platform.node(),
-            'checksum': hashlib.md5(str(self.config).encode()).hexdigest()
-        }
-
-
-def deep_update(target: dict, source: dict) -> dict:
-    """
-    递归合并源字典到目标字典，保留嵌套结构
-    Args:
-        target: 目标字典（默认配置）
-        source: 源字典（用户自定义配置）
-    Returns:
-        合并后的新字典（不会修改原始目标字典）
-    """
-    # 创建目标字典的深拷贝，避免修改原始数据
-    merged = copy.deepcopy(target)
-
-    for key, value in source.items():
-        # 如果当前键的值是字典，且目标中已有该键且也是字典，则递归合并
-        if isinstance(value, dict) and key in merged and isinstance(merged[key], dict):
-            merged[key] = deep_update(merged[key], value)
-        else:
-            # 直接覆盖非字典类型或新键
-            merged[key] = copy.deepcopy(value)
-    return merged
-
-# 1. 合并列表（需定制）
-# 如果需要合并列表而不是覆盖，可以扩展函数：
-#
-# def deep_update(target, source):
-#     merged = copy.deepcopy(target)
-#     for key, value in source.items():
-#         if key not in merged:
-#             merged[key] = copy.deepcopy(value)
-#         else:
-#             if isinstance(value, dict):
-#                 merged[key] = deep_update(merged[key], value)
-#             elif isinstance(value, list):
-#                 merged[key] = merged[key] + value  # 合并列表
-#             else:
-#                 merged[key] = value
-#     return merged
+    def _collect_metadata(self) -> Mapping:
+        """会话元数据（每个会话只计算一次，所有批次共享同一个只读对象）"""
+        if self._metadata is None:
+            self._metadata = MappingProxyType({
+                'session_id': getattr(self.actuator, 'session_id', None) or self._session_id,
+                'host': platform.node(),
+                'checksum': hashlib.md5(str(self.config).encode()).hexdigest()
+            })
+        return self._metadata
 
 
 # 加载和解析配置文件
-def load_configuration(config_path: str, env_overrides: dict = None) -> dict:
+def load_configuration(config_path: str, env_overrides: dict = None) -> Mapping:
     """加载并解析配置文件
 
     Args:
@@ -121,7 +330,7 @@ def load_configuration(config_path: str, env_overrides: dict = None) -> dict:
         env_overrides: 可覆盖配置的环境变量字典
 
     Returns:
-        解析后的配置字典
+        解析后的只读配置（MappingProxyType，可在多个组件之间直接共享；需要修改时使用thaw复制）
     """
     path = Path(config_path)
 
@@ -129,20 +338,18 @@ def load_configuration(config_path: str, env_overrides: dict = None) -> dict:
     if not path.exists():
         raise FileNotFoundError(f"配置文件 {config_path} 不存在")
 
-    # 读取文件内容
-    with open(path, 'r', encoding='utf-8') as f:
-        if path.suffix in ['.yml', '.yaml']:
-            config = yaml.safe_load(f)
-        elif path.suffix == '.json':
-            config = json.load(f)
-        else:
-            raise ValueError("不支持的配置文件格式")
+    # 读取并解析（文件未变化时直接使用缓存中的只读配置）
+    config = config_cache.load(path)
 
-    # 应用环境变量替换
+    # 应用环境变量替换（只复制包含替换值的分支 其余部分与缓存共享）
     def replace_env_vars(obj):
-        if isinstance(obj, dict):
+        if isinstance(obj, Mapping):
+            changed = {}
             for k, v in obj.items():
-                obj[k] = replace_env_vars(v)
+                replaced = replace_env_vars(v)
+                if replaced is not v:
+                    changed[k] = replaced
+            return MappingProxyType({**obj, **changed}) if changed else obj
         elif isinstance(obj, str) and obj.startswith('{env:'):
             var_name = obj[5:-1]
             return os.environ.get(var_name, '')
@@ -157,7 +364,7 @@ def load_configuration(config_path: str, env_overrides: dict = None) -> dict:
     # 基本路径处理
     if 'base_dir' in config:
         base = Path(config['base_dir']).expanduser().resolve()
-        config['base_dir'] = str(base)
+        config = deep_update(config, {'base_dir': str(base)})
         base.mkdir(parents=True, exist_ok=True)
 
     return config
@@ -182,15 +389,6 @@ def load_configuration(config_path: str, env_overrides: dict = None) -> dict:
     #
     #     validated_config = ConfigSchema(**config).dict()
     #
-    #     # 添加缓存机制
-    #     if not hasattr(load_configuration, 'cache'):
-    #         load_configuration.cache = {}
-    #
-    #     file_hash = hashlib.md5(path.read_bytes()).hexdigest()
-    #     if file_hash in load_configuration.cache:
-    #         return load_configuration.cache[file_hash]
-    #
-    #     load_configuration.cache[file_hash] = validated_config
     #     return validated_config
 
 
@@ -0,0 +1,187 @@
+"""
+配置缓存：按路径 + mtime + 内容哈希缓存解析后的配置，结果冻结为只读对象，可在各处直接共享
+
+用法：
+    config = config_cache.load("config/log_manager.yml")  # 文件未变化时不重新读取和解析
+    merged = deep_update(config, {"file_manager": {"channel": "debug"}})  # 只复制改动的分支
+
+- 冻结：dict → MappingProxyType，list → tuple；需要可修改的副本时使用thaw
+- 文件的mtime与大小都没有变化时直接使用缓存；mtime距今不足racy_window秒时
+  （同一时间粒度内可能再次被修改）额外比较内容哈希
+- 内容哈希相同的文件（例如只被touch）不重新解析
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+import yaml
+
+__all__ = ['ConfigCache', 'config_cache', 'freeze', 'thaw', 'deep_update']
+
+_LOADERS: Dict[str, Callable[[bytes], Any]] = {
+    '.yml': yaml.safe_load,
+    '.yaml': yaml.safe_load,
+    '.json': json.loads,
+}
+
+
+# ================= 冻结 =================
+def freeze(obj: Any) -> Any:
+    """递归转换为只读对象（已冻结的MappingProxyType直接返回，不再复制）"""
+    if isinstance(obj, MappingProxyType):
+        return obj
+    if isinstance(obj, Mapping):
+        return MappingProxyType({key: freeze(value) for key, value in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(item) for item in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """递归转换回可修改的dict/list（返回新的副本）"""
+    if isinstance(obj, Mapping):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [thaw(item) for item in obj]
+    return obj
+
+
+# ================= 合并 =================
+def deep_update(target: Mapping, source: Mapping) -> Mapping:
+    """
+    递归合并源字典到目标字典，保留嵌套结构（结构共享）
+    Args:
+        target: 目标字典（默认配置）
+        source: 源字典（用户自定义配置）
+    Returns:
+        合并后的只读配置；只有被修改的分支是新对象，其余分支与target共享，
+        没有任何改动时直接返回target（不会修改原始目标字典）
+    """
+    target = freeze(target)
+    changed = {}
+    for key, value in source.items():
+        current = target.get(key)
+        # 如果当前键的值是字典，且目标中已有该键且也是字典，则递归合并
+        if isinstance(value, Mapping) and isinstance(current, Mapping):
+            value = deep_update(current, value)
+        else:
+            # 直接覆盖非字典类型或新键
+            value = freeze(value)
+        if value is not current or key not in target:
+            changed[key] = value
+    if not changed:
+        return target
+    merged = dict(target)  # 浅复制：只复制这一层 子分支仍然共享
+    merged.update(changed)
+    return MappingProxyType(merged)
+
+# 1. 合并列表（需定制）
+# 如果需要合并列表而不是覆盖，可以扩展函数：
+#
+# def deep_update(target, source):
+#     merged = copy.deepcopy(target)
+#     for key, value in source.items():
+#         if key not in merged:
+#             merged[key] = copy.deepcopy(value)
+#         else:
+#             if isinstance(value, dict):
+#                 merged[key] = deep_update(merged[key], value)
+#             elif isinstance(value, list):
+#                 merged[key] = merged[key] + value  # 合并列表
+#             else:
+#                 merged[key] = value
+#     return merged
+
+
+# ================= 缓存 =================
+class _Entry(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+    config: Any
+
+
+class ConfigCache:
+    """配置文件解析缓存（线程安全，LRU淘汰）"""
+
+    def __init__(self, max_entries: int = 64, racy_window: float = 2.0):
+        """
+        :param max_entries: 最多缓存的文件数
+        :param racy_window: mtime距今不足该秒数时，即使mtime未变也比较内容哈希
+        """
+        self.max_entries = max_entries
+        self.racy_window = racy_window
+        self._entries: "OrderedDict[Tuple[str, Callable], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0  # 只检查mtime即命中
+        self.verified = 0  # mtime变化或无法判断 但内容哈希相同
+        self.parses = 0  # 重新解析的次数
+
+    def load(self, path: Union[str, Path], loader: Optional[Callable[[bytes], Any]] = None) -> Any:
+        """
+        读取并解析配置文件，返回冻结的配置（同一内容的多次调用返回同一个对象）
+        :param loader: 解析函数（bytes → 对象），默认按后缀选择YAML/JSON
+        """
+        path = Path(path)
+        if loader is None:
+            loader = _LOADERS.get(path.suffix)
+            if loader is None:
+                raise ValueError("不支持的配置文件格式")
+        key = (str(path.resolve()), loader)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size \
+                    and time.time() - stat.st_mtime > self.racy_window:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.config
+
+        # 读取和解析不持有锁 不同文件可以同时加载
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+        unchanged = entry is not None and entry.digest == digest
+        config = entry.config if unchanged else freeze(loader(content))
+
+        with self._lock:
+            if unchanged:
+                self.verified += 1
+            else:
+                self.parses += 1
+            self._entries[key] = _Entry(stat.st_mtime_ns, len(content), digest, config)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return config
+
+    def invalidate(self, path: Optional[Union[str, Path]] = None):
+        """清除指定文件（None为全部）的缓存"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            resolved = str(Path(path).resolve())
+            for key in [key for key in self._entries if key[0] == resolved]:
+                del self._entries[key]
+
+    def snapshot(self) -> Dict[str, int]:
+        """返回缓存统计"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "verified": self.verified,
+            "parses": self.parses,
+        }
+
+
+# ================= 全局单例 =================
+config_cache = ConfigCache()
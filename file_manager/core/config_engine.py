@@ -1,10 +1,9 @@
 """配置处理"""
 
-import yaml
 from pathlib import Path
 
 from configvalidator import ConfigValidator
-from mergedeep import merge
+from file_manager.core.config_cache import config_cache, deep_update, freeze
 # from validators import ConfigValidator
 
 
@@ -13,17 +12,17 @@ class ConfigEngine:
 
     def __init__(self, custom_config=None):
         self.base_config = self._load_base_config()
-        self.user_config = custom_config or {}
+        self.user_config = freeze(custom_config or {})
 
     def _load_base_config(self):
-        with open(self._BASE_CONFIG) as f:
-            return yaml.safe_load(f)
+        # 所有实例共享同一个只读的默认配置 文件未变化时不重新解析
+        return config_cache.load(self._BASE_CONFIG)
 
     def build(self, env_vars=None):
-        merged = merge({}, self.base_config, self.user_config)
+        # 结构共享合并：只复制用户配置覆盖到的分支
+        merged = deep_update(self.base_config, self.user_config)
         return ConfigValidator(merged, env_vars).validate()
 
     @classmethod
     def from_yaml(cls, yaml_path):
-        with open(yaml_path) as f:
-            return cls(yaml.safe_load(f))
\ No newline at end of file
+        return cls(config_cache.load(yaml_path))
@@ -0,0 +1,84 @@
+"""AsyncFileBridge：队列满时的overflow策略与磁盘段"""
+
+import asyncio
+
+import pytest
+
+from file_manager.core.async_bridge import AsyncFileBridge
+
+
+def _bridge(tmp_path, overflow, **config):
+    return AsyncFileBridge(actuator=None, config={
+        "batch_size": 8, "flush_interval": 0.01, "channel": "file", "queue_size": 4,
+        "overflow": overflow, "spill_path": str(tmp_path / "bridge.spill"), **config,
+    })
+
+
+async def _drain(bridge):
+    """停止接收后送出队列与磁盘段中剩余的全部操作"""
+    bridge._active = False
+    received = []
+    async for event in bridge.event_emitter():
+        received += [op.payload["i"] for op in event.data["operations"]]
+    return received
+
+
+def _emit_then_drain(bridge, count):
+    async def main():
+        for i in range(count):
+            await bridge.emit_operation("write", {"i": i})
+        return await _drain(bridge)
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("overflow, expected", [
+    ("drop_newest", [0, 1, 2, 3]),
+    ("drop_oldest", [6, 7, 8, 9]),
+    ("sample", [2, 3, 6, 9]),  # 每3个溢出操作保留1个（替换最旧的操作）
+])
+def test_dropping_policies(tmp_path, overflow, expected):
+    bridge = _bridge(tmp_path, overflow, sample_every=3)
+    assert _emit_then_drain(bridge, 10) == expected
+    assert bridge.stats.dropped == 6
+    assert bridge.stats.max_depth == 4
+
+
+def test_spill_keeps_every_operation_in_order(tmp_path):
+    bridge = _bridge(tmp_path, "spill")
+    assert _emit_then_drain(bridge, 20) == list(range(20))
+    assert (bridge.stats.spilled, bridge.stats.replayed, bridge.stats.dropped) == (16, 16, 0)
+    assert not (tmp_path / "bridge.spill").exists()  # 全部读回后删除
+
+
+def test_spill_ignores_records_left_by_a_crashed_session(tmp_path):
+    (tmp_path / "bridge.spill").write_text(
+        '{"operation":"write","payload":{"i":-1},"timestamp":0}\n' * 3, encoding="utf-8")
+    bridge = _bridge(tmp_path, "spill")
+    assert _emit_then_drain(bridge, 10) == list(range(10))
+
+
+def test_block_waits_for_the_consumer(tmp_path):
+    bridge = _bridge(tmp_path, "block")
+
+    async def main():
+        received = []
+
+        async def consume():
+            async for event in bridge.event_emitter():
+                received.extend(op.payload["i"] for op in event.data["operations"])
+
+        consumer = asyncio.create_task(consume())
+        for i in range(20):
+            await bridge.emit_operation("write", {"i": i})
+        bridge._active = False
+        await asyncio.wait_for(consumer, timeout=5)
+        return received
+
+    assert asyncio.run(main()) == list(range(20))
+    assert bridge.stats.dropped == 0 and bridge.stats.max_depth <= 4
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        _bridge(tmp_path, "discard")
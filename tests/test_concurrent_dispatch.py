@@ -0,0 +1,70 @@
+"""并发模式下的分发顺序与控制命令"""
+
+import asyncio
+
+from EventActuator import Actuator, Event, get_actuator
+from EventActuator.commands import LoggerInstructionLibrary as logger
+
+
+def _run(events, concurrency=None):
+    actuator = Actuator()
+    executed = []
+
+    async def work(data):
+        await asyncio.sleep(0.001)
+        executed.append(data["i"])
+
+    async def stop(data):
+        actuator.stop()
+
+    actuator.commands["w"] = work
+    actuator.commands["exit"] = stop
+
+    async def source():
+        for event in events:
+            yield event
+
+    actuator.bind_generator(source())
+    asyncio.run(actuator.main_loop(concurrency=concurrency))
+    return executed
+
+
+def _script():
+    return [Event("w", {"i": 0}), Event("exit", None)] + [Event("w", {"i": i}) for i in range(1, 6)]
+
+
+def test_exit_stops_sequential_loop():
+    assert _run(_script()) == [0]
+
+
+def test_exit_is_a_barrier_in_concurrent_loop():
+    # exit之前的事件全部执行完成 之后的事件不再分发
+    assert _run(_script(), concurrency=8) == [0]
+
+
+def test_concurrent_loop_runs_all_events_without_exit():
+    events = [Event("w", {"i": i}) for i in range(6)]
+    assert _run(events, concurrency=8) == list(range(6))
+
+
+def test_pathless_log_close_waits_for_all_lanes(tmp_path):
+    # 不带path的log_close作为屏障：各文件通道中的写入全部完成后再关闭
+    logger.register_commands()
+    actuator = get_actuator()
+    paths = [str(tmp_path / f"app_{i}.log") for i in range(4)]
+    events = [Event("log_open", {"path": path}) for path in paths]
+    events += [Event("log_write", {"path": path, "content": f"line {i}"}) for i in range(50) for path in paths]
+    events.append(Event("log_close", None))
+
+    async def source():
+        for event in events:
+            yield event
+
+    actuator.bind_generator(source())
+    asyncio.run(actuator.main_loop(concurrency=8))
+    assert not logger.open_log_files
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert [line for line in lines if line.startswith("line ")] == [f"line {i}" for i in range(50)]
+        assert lines[-1].startswith("end:")
@@ -0,0 +1,65 @@
+"""DirectoryIndex：按层数限制的增量刷新"""
+
+import shutil
+
+from FilesIO import DirectoryIndex, get_files
+
+
+def _make_tree(root, depth=5, width=2):
+    """每层width个目录，每个目录中一个文件"""
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for directory in level:
+            (directory / "file.txt").write_text("x")
+            for i in range(width):
+                child = directory / f"d{i}"
+                child.mkdir()
+                next_level.append(child)
+        level = next_level
+
+
+def test_refresh_stops_at_max_depth(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root)
+    with DirectoryIndex(root, str(tmp_path / "index.db")) as index:
+        assert index.refresh(max_depth=1)["scanned"] == 1 + 2  # 根目录与第1层的目录
+        assert {entry["path"] for entry in index.query()} == {
+            entry["path"] for entry in get_files(root, max_depth=1)}
+
+        # 之后需要更深的层时只读取新增的层
+        result = index.refresh(max_depth=3)
+        assert (result["scanned"], result["skipped"]) == (4 + 8, 3)
+        assert sorted(entry["path"] for entry in index.query()) == sorted(
+            entry["path"] for entry in get_files(root, max_depth=3))
+
+
+def test_shallow_refresh_keeps_and_prunes_deeper_levels(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root, depth=4)
+    with DirectoryIndex(root, str(tmp_path / "index.db")) as index:
+        index.refresh()
+        total = len(list(index.query()))
+
+        # 较浅的刷新不删除已索引的更深目录
+        assert index.refresh(max_depth=0)["removed"] == 0
+        assert len(list(index.query())) == total
+
+        # 目录被删除时 其下已索引的各层一并删除
+        shutil.rmtree(root / "d0")
+        assert index.refresh(max_depth=0)["removed"] == 1 + 2 + 4 + 8
+        assert not [entry for entry in index.query() if entry["path"].startswith("d0")]
+        assert sorted(entry["path"] for entry in index.query()) == sorted(
+            entry["path"] for entry in get_files(root, max_depth=4))
+
+
+def test_get_files_with_index_matches_walk(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    _make_tree(root, depth=3)
+    index_path = str(tmp_path / "index.db")
+    for max_depth in (0, 2, 1):
+        assert sorted(entry["path"] for entry in get_files(root, max_depth=max_depth, index=index_path)) == sorted(
+            entry["path"] for entry in get_files(root, max_depth=max_depth))
@@ -0,0 +1,60 @@
+"""EventCache：旧式register_hook钩子的兼容性与spill文件的写入"""
+
+import asyncio
+import json
+
+from FilesIO import EventCache, JSONEventProcessor
+
+
+def _event(i):
+    return {"event_type": "noop", "data": {"i": i}}
+
+
+def test_cache_supports_deque_style_indexing():
+    cache = EventCache(max_events=3)
+    for i in range(5):
+        cache.append(_event(i))
+    assert len(cache) == 3 and cache.evicted == 2
+    assert cache[0]["data"]["i"] == 2
+    assert cache[-1]["data"]["i"] == 4
+    assert [event["data"]["i"] for event in cache] == [2, 3, 4]
+
+
+def test_legacy_hook_reads_latest_event(tmp_path):
+    path = tmp_path / "script.json"
+    path.write_text(json.dumps([{"type": "noop", "i": i} for i in range(3)]))
+    processor = JSONEventProcessor()
+    seen = []
+    processor.register_hook(lambda cache: seen.append(cache[-1]["data"]["i"]))
+
+    async def consume():
+        async for _ in processor.stream_events(str(path)):
+            pass
+
+    asyncio.run(consume())
+    assert seen == [0, 1, 2]
+
+
+def test_spill_is_flushed_when_stream_ends(tmp_path):
+    path, spill = tmp_path / "script.json", tmp_path / "spill.jsonl"
+    path.write_text(json.dumps([{"type": "noop", "i": i} for i in range(100)]))
+    processor = JSONEventProcessor(cache_max_events=10, spill_path=str(spill))
+
+    async def consume():
+        async for _ in processor.stream_events(str(path)):
+            pass
+
+    asyncio.run(consume())
+    # 被淘汰的90个事件全部写入（不足SPILL_BATCH的部分在流结束时写入）
+    with open(spill, encoding="utf-8") as f:
+        assert [json.loads(line)["i"] for line in f] == list(range(90))
+
+
+def test_close_flushes_pending_spill(tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    processor = JSONEventProcessor(cache_max_events=2, spill_path=str(spill))
+    for i in range(5):
+        processor._event_cache.append(_event(i))
+    assert not spill.exists()
+    asyncio.run(processor.close())
+    assert spill.read_text(encoding="utf-8").count("\n") == 3
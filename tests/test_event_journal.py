@@ -0,0 +1,103 @@
+"""EventJournal：中断后续读、乱序完成、写了一半的记录与CRLF脚本"""
+
+import asyncio
+import json
+
+import pytest
+
+from EventActuator import EventJournal
+
+
+def _write_array(path, count, newline="\n"):
+    items = [json.dumps({"type": "w", "i": i, "text": "中文"}, ensure_ascii=False) for i in range(count)]
+    text = "[" + newline + ("," + newline).join("  " + item for item in items) + newline + "]" + newline
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def _write_lines(path, count, newline="\n"):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i in range(count):
+            f.write(json.dumps({"type": "w", "i": i}) + newline)
+
+
+def _run(journal_path, script, limit=None, complete=lambda seq: True):
+    """读取最多limit个事件，complete(seq)为True的事件记录为已完成，返回读到的事件序号"""
+    async def main():
+        journal = EventJournal(journal_path, group_size=4)
+        seen = []
+        events = journal.resume(str(script))
+        try:
+            async for event in events:
+                seq = event.position[0]
+                seen.append((event.data["i"], seq))
+                if complete(seq):
+                    journal.record(*event.position)
+                if limit is not None and len(seen) >= limit:
+                    break
+        finally:
+            await events.aclose()
+            await journal.close()
+        return seen
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_array_script_resumes_after_interruption(tmp_path, newline):
+    script, journal_path = tmp_path / "script.json", str(tmp_path / "script.journal")
+    _write_array(script, 10, newline)
+
+    assert [i for i, _ in _run(journal_path, script, limit=4)] == [0, 1, 2, 3]
+    # 记录的偏移与文件中的字节位置一致（CRLF不会被换算为一个字符）
+    offset = EventJournal(journal_path).resume_point()[1]
+    assert script.read_bytes()[:offset].endswith('"text": "中文"}'.encode("utf-8"))
+    assert _run(journal_path, script) == [(i, i) for i in range(4, 10)]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_jsonl_script_resumes_after_interruption(tmp_path, newline):
+    script, journal_path = tmp_path / "script.jsonl", str(tmp_path / "script.journal")
+    _write_lines(script, 10, newline)
+
+    _run(journal_path, script, limit=3)
+    assert [i for i, _ in _run(journal_path, script)] == list(range(3, 10))
+
+
+def test_out_of_order_completion_is_not_repeated(tmp_path):
+    script, journal_path = tmp_path / "script.json", str(tmp_path / "script.journal")
+    _write_array(script, 6)
+
+    # 并发执行时1号事件未完成 之后的2、3号已经完成
+    _run(journal_path, script, limit=4, complete=lambda seq: seq != 1)
+    next_seq, _, done = EventJournal(journal_path).resume_point()
+    assert (next_seq, done) == (1, {2, 3})
+
+    assert [i for i, _ in _run(journal_path, script)] == [1, 4, 5]
+    assert EventJournal(journal_path).resume_point()[::2] == (6, set())
+
+
+def test_torn_record_is_truncated(tmp_path):
+    script, journal_path = tmp_path / "script.json", str(tmp_path / "script.journal")
+    _write_array(script, 5)
+    _run(journal_path, script, limit=2)
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write("[2,")  # 中断时写了一半的记录
+
+    journal = EventJournal(journal_path)
+    assert journal.resume_point()[0] == 2
+    with open(journal_path, encoding="utf-8") as f:
+        assert f.read().endswith("]\n")
+    # 截断后追加的记录可以正常读取
+    _run(journal_path, script, limit=1)
+    assert EventJournal(journal_path).resume_point()[0] == 3
+
+
+def test_journal_belongs_to_one_script(tmp_path):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    _write_array(first, 2)
+    _write_array(second, 2)
+    journal_path = str(tmp_path / "script.journal")
+    _run(journal_path, first, limit=1)
+    with pytest.raises(ValueError):
+        _run(journal_path, second)
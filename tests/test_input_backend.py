@@ -0,0 +1,86 @@
+"""键鼠命令：通过set_backend注入记录调用的替身后端"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from EventActuator.commands import KeyboardAndMouseOperation as kmo
+
+
+class RecordingBackend:
+    """记录调用顺序与执行线程的替身pyautogui"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def _record(self, name, *args):
+        if self.delay:
+            time.sleep(self.delay)  # 模拟阻塞的系统调用
+        self.calls.append((name, args, threading.current_thread().name))
+
+    def moveTo(self, x, y):
+        self._record("moveTo", x, y)
+
+    def click(self, *args):
+        self._record("click", *args)
+
+    def typewrite(self, text):
+        self._record("typewrite", text)
+
+
+@pytest.fixture
+def backend():
+    original = kmo._input_backend
+    fake = RecordingBackend()
+    kmo.set_backend(fake)
+    yield fake
+    kmo.set_backend(original)
+    kmo.shutdown_input_executor()
+
+
+def test_calls_run_in_submission_order_on_input_thread(backend):
+    async def main():
+        # 同时提交多个操作 单线程执行器按提交顺序执行
+        await asyncio.gather(*(kmo.run_input("moveTo", i, i) for i in range(20)),
+                             kmo.run_input("typewrite", "abc"))
+        return threading.current_thread().name
+
+    loop_thread = asyncio.run(main())
+    assert [call[:2] for call in backend.calls] == [("moveTo", (i, i)) for i in range(20)] + [("typewrite", ("abc",))]
+    assert {call[2] for call in backend.calls} != {loop_thread}
+    assert all(call[2].startswith("input") for call in backend.calls)
+
+
+def test_registered_commands_use_backend(backend):
+    kmo.register_commands()
+    commands = kmo.get_actuator().commands
+
+    async def main():
+        await commands["mouse_move"]({"x": 1, "y": 2})
+        await commands["click"]({"x": 3, "y": 4})
+        await commands["keyboard_input"]({"text": "hi"})
+
+    asyncio.run(main())
+    assert [call[:2] for call in backend.calls] == [("moveTo", (1, 2)), ("click", (3, 4)), ("typewrite", ("hi",))]
+
+
+def test_loop_stays_responsive_during_slow_call(backend):
+    backend.delay = 0.3
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        await kmo.run_input("click")
+        task.cancel()
+
+    asyncio.run(main())
+    assert backend.calls and ticks >= 10  # 阻塞调用期间事件循环仍在调度其他任务
@@ -0,0 +1,90 @@
+"""JSONArrayStreamParser：分块增量解析与字节偏移"""
+
+import json
+
+import pytest
+
+from FilesIO import JSONArrayStreamParser
+
+DOCUMENT = (
+    '[ {"type": "a", "x": 1.5e2, "text": "中文\\"\\u00e9"},\n'
+    '  2.5, -10, 1e-3, 0, true, false, null, "s]t,r",\n'
+    '  [1, [2, {"k": []}]], {}, [] ]'
+)
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _parse(text, size, **options):
+    parser = JSONArrayStreamParser(**options)
+    items, ends = [], []
+    for chunk in _chunks(text, size):
+        items.extend(parser.feed(chunk))
+        ends.extend(parser.item_ends)
+    items.extend(parser.close())
+    ends.extend(parser.item_ends)
+    return items, ends
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOCUMENT)])
+def test_chunked_parse_matches_json_loads(size):
+    items, _ = _parse(DOCUMENT, size)
+    assert items == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 64])
+def test_whitespace_runs_across_chunks(size):
+    # 缩进格式化的数组：元素之间的空白长短不一 且会被分块截断
+    text = json.dumps([{"i": i, "v": [i, {"k": None}]} for i in range(20)], indent=8) + " \r\n\t \n"
+    items, ends = _parse(text, size, track_offsets=True)
+    assert items == json.loads(text)
+    assert all(text.encode("utf-8")[end - 1:end] == b"}" for end in ends)
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    (["[2.", "5]"], [2.5]),
+    (["[1", "e3, -", "2]"], [1000.0, -2]),
+    (["[1", "2", "3 ]"], [123]),
+    (["[tr", "ue,", " nu", "ll]"], [True, None]),
+])
+def test_truncated_scalars_wait_for_delimiter(chunks, expected):
+    parser = JSONArrayStreamParser()
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    assert items == expected
+
+
+@pytest.mark.parametrize("text", ["[1, 2", "[1 2]", "{}", "[1] 2"])
+def test_malformed_input_raises(text):
+    parser = JSONArrayStreamParser()
+    with pytest.raises(json.JSONDecodeError):
+        for chunk in _chunks(text, 1):
+            parser.feed(chunk)
+        parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, len(DOCUMENT)])
+def test_item_ends_are_utf8_byte_offsets(size):
+    data = DOCUMENT.encode("utf-8")
+    items, ends = _parse(DOCUMENT, size, track_offsets=True)
+    assert len(ends) == len(items)
+    start = data.index(b"[") + 1
+    for item, end in zip(items, ends):
+        # 上一个结束位置到当前结束位置之间只有分隔符和当前元素
+        assert json.loads(data[start:end].decode("utf-8").lstrip(", \n")) == item
+        start = end
+
+
+@pytest.mark.parametrize("size", [1, 3])
+def test_resume_from_item_end(size):
+    data = DOCUMENT.encode("utf-8")
+    expected = json.loads(DOCUMENT)
+    _, ends = _parse(DOCUMENT, size, track_offsets=True)
+    for index, end in enumerate(ends):
+        items, resumed_ends = _parse(data[end:].decode("utf-8"), size, track_offsets=True, offset=end)
+        assert items == expected[index + 1:]
+        assert resumed_ends == ends[index + 1:]
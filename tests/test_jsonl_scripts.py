@@ -0,0 +1,42 @@
+"""JSON Lines脚本的读取：没有换行结尾的最后一行"""
+
+import asyncio
+
+import pytest
+
+from FilesIO import JSONEventProcessor, iter_script
+
+
+def _read_async(path, offset=0):
+    processor = JSONEventProcessor()
+
+    async def collect():
+        return [event["event_type"] async for event in processor.stream_events(str(path), offset=offset)]
+
+    return asyncio.run(collect()), processor.current_offset
+
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"type": "a"}\n{"type": "b"}\n', ["a", "b"]),
+    ('{"type": "a"}\n{"type": "b"}', ["a", "b"]),  # 手写的脚本 最后一行没有换行
+    ('{"type": "a"}\n{"type": "b", "x"', ["a"]),  # 录制器写了一半的行
+    ('{"type": "a"}\n\n', ["a"]),
+])
+def test_async_and_sync_readers_agree(tmp_path, content, expected):
+    path = tmp_path / "script.jsonl"
+    path.write_bytes(content.encode("utf-8"))
+    events, _ = _read_async(path)
+    assert events == expected
+    assert [raw["type"] for raw in iter_script(str(path))] == expected
+
+
+def test_partial_line_is_resumed_after_completion(tmp_path):
+    path = tmp_path / "script.jsonl"
+    path.write_bytes(b'{"type": "a"}\n{"type": "b", "x"')
+    events, offset = _read_async(path)
+    assert events == ["a"] and offset == len(b'{"type": "a"}\n')
+
+    with open(path, "ab") as f:
+        f.write(b': 1}\n{"type": "c"}')
+    events, offset = _read_async(path, offset)
+    assert events == ["b", "c"] and offset == path.stat().st_size
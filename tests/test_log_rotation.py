@@ -0,0 +1,54 @@
+"""日志轮转：批量写入时的大小上限与post_rotate钩子出错"""
+
+import asyncio
+import os
+
+import pytest
+
+from EventActuator.commands import LoggerInstructionLibrary as logger
+from EventActuator.commands.LoggerInstructionLibrary import LogFilePool, LogRotation, LogWriteBuffer
+
+
+def _write_lines(path, count, rotation, **writer_options):
+    pool = LogFilePool()
+
+    async def main():
+        await pool.open(path, "a", rotation)
+        writer = LogWriteBuffer(path, pool=pool, **writer_options)
+        for i in range(count):
+            await writer.write(f"line {i:05d} " + "x" * 40 + "\n")
+        await writer.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        pool.shutdown()
+
+
+def _log_files(directory):
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))]
+
+
+@pytest.mark.parametrize("durability", ["batched", "flush_each"])
+def test_rotate_bytes_is_a_hard_limit(tmp_path, durability):
+    path = str(tmp_path / "app.log")
+    _write_lines(path, 500, LogRotation(rotate_bytes=2000, compress="none"), durability=durability)
+
+    files = _log_files(tmp_path)
+    assert len(files) > 1
+    assert all(os.path.getsize(name) <= 2000 for name in files)
+    lines = [line for name in files for line in open(name, encoding="utf-8") if line.startswith("line ")]
+    assert sorted(lines) == [f"line {i:05d} " + "x" * 40 + "\n" for i in range(500)]
+
+
+class _FailingRegistry:
+    async def trigger(self, name, context):
+        await asyncio.sleep(0.05)  # 关闭时仍在进行中
+        raise RuntimeError("hook failed")
+
+
+def test_failing_post_rotate_hook_does_not_break_close(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "log_hook_registry", _FailingRegistry())
+    path = str(tmp_path / "app.log")
+    _write_lines(path, 100, LogRotation(rotate_bytes=1000, compress="none"))
+    assert len(_log_files(tmp_path)) > 1
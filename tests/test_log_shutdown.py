@@ -0,0 +1,65 @@
+"""执行器结束时写完日志缓冲（批量写入为默认模式）"""
+
+import asyncio
+
+import pytest
+
+from EventActuator import Event, get_actuator
+from EventActuator.commands import LoggerInstructionLibrary as logger
+
+
+@pytest.fixture
+def actuator():
+    logger.register_commands()
+    yield get_actuator()
+    for path in list(logger.open_log_files):
+        logger.open_log_files.pop(path)
+        asyncio.run(logger.log_file_pool.close(path))
+
+
+def _run(actuator, events, concurrency=None):
+    async def source():
+        for event in events:
+            yield event
+
+    actuator.bind_generator(source())
+    asyncio.run(actuator.main_loop(concurrency=concurrency))
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [line for line in f if line.startswith("line ")]
+
+
+@pytest.mark.parametrize("concurrency", [None, 8])
+def test_exit_drains_batched_writes(actuator, tmp_path, concurrency):
+    path = str(tmp_path / "app.log")
+    events = [Event("log_open", {"path": path, "flush_interval": 60})]
+    events += [Event("log_write", {"path": path, "content": f"line {i}"}) for i in range(100)]
+    events.append(Event("exit", None))
+    _run(actuator, events, concurrency)
+    assert _lines(path) == [f"line {i}\n" for i in range(100)]
+
+
+def test_end_of_script_drains_batched_writes(actuator, tmp_path):
+    path = str(tmp_path / "app.log")
+    events = [Event("log_open", {"path": path, "flush_interval": 60})]
+    events += [Event("log_write", {"path": path, "content": f"line {i}"}) for i in range(10)]
+    _run(actuator, events)
+    assert len(_lines(path)) == 10
+
+
+def test_failing_shutdown_hook_does_not_block_others(actuator, tmp_path):
+    calls = []
+
+    def broken():
+        raise RuntimeError("hook failed")
+
+    actuator.shutdown_hooks.insert(0, broken)
+    try:
+        actuator.add_shutdown_hook(lambda: calls.append("done"))
+        _run(actuator, [Event("exit", None)])
+    finally:
+        actuator.shutdown_hooks[:] = [hook for hook in actuator.shutdown_hooks
+                                      if hook is logger.flush_open_logs]
+    assert calls == ["done"]
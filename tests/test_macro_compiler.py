@@ -0,0 +1,27 @@
+"""MacroCompiler：编译后回放的事件与原脚本一致（包括数值类型）"""
+
+import json
+
+from MacroCompiler import MacroFile, compile_macro
+
+EVENTS = [
+    {"type": "mouse_move", "x": 10, "y": -20, "duration": 0.25},
+    {"type": "sleep", "duration": 1},
+    {"type": "keyboard_input", "text": "中文", "interval": 0},
+    {"type": "click", "x": 1.5, "y": 2 ** 40},
+    {"type": "sleep", "sleep": 2 ** 60},
+    {"type": "exit", "end": "done"},
+]
+
+
+def test_round_trip_preserves_values_and_types(tmp_path):
+    src = tmp_path / "script.json"
+    dst = tmp_path / "script.macro"
+    src.write_text(json.dumps(EVENTS, ensure_ascii=False), encoding="utf-8")
+    assert compile_macro(str(src), str(dst)) == len(EVENTS)
+
+    with MacroFile(str(dst)) as macro:
+        replayed = [{"type": event.type, **event.data} for event in macro.events()]
+    # json文本比较可以区分1与1.0
+    assert [json.dumps(event, sort_keys=True) for event in replayed] == \
+           [json.dumps(event, sort_keys=True) for event in EVENTS]
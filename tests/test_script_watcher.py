@@ -0,0 +1,25 @@
+"""ScriptWatcher的停止行为"""
+
+import asyncio
+import json
+
+import pytest
+
+from ScriptWatcher import ScriptWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_stop_while_consuming_events(tmp_path, use_inotify):
+    (tmp_path / "a.json").write_text(json.dumps([{"type": "noop", "i": 0}, {"type": "noop", "i": 1}]))
+    watcher = ScriptWatcher(str(tmp_path), debounce=0.01, poll_interval=0.05,
+                            use_inotify=use_inotify, process_existing=True)
+
+    async def consume():
+        received = []
+        async for event in watcher.events():
+            received.append(event.data["i"])
+            watcher.stop()  # 调用方处理事件期间停止
+        return received
+
+    received = asyncio.run(asyncio.wait_for(consume(), timeout=5))
+    assert received == [0, 1]  # 当前脚本读完后结束 不再等待新的变化
@@ -0,0 +1,90 @@
+"""ShardedActuator：按时间发送批次、工作进程异常退出、分片键分布与日志关闭"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+
+from EventActuator import Event, ShardedActuator, get_actuator
+
+
+def register_stamp():
+    """工作进程中注册：把执行时间写入事件指定的文件"""
+    @get_actuator().register("stamp")
+    async def stamp(data):
+        with open(data["out"], "w") as f:
+            f.write(repr(time.time()))
+
+
+def die():
+    os._exit(1)
+
+
+def test_partial_batch_is_sent_while_source_is_idle(tmp_path):
+    out = tmp_path / "stamp"
+    sharded = ShardedActuator(workers=1, setup=[f"{__name__}:register_stamp"], flush_interval=0.05)
+    sent_at = []
+
+    async def source():
+        await asyncio.sleep(1.5)  # 等待工作进程启动
+        sent_at.append(time.time())
+        yield Event("stamp", {"out": str(out)})
+        await asyncio.sleep(2.0)  # 来源停顿
+
+    sharded.bind_generator(source())
+    asyncio.run(sharded.main_loop())
+    assert float(out.read_text()) - sent_at[0] < 1.0
+
+
+def test_dead_worker_does_not_break_shutdown():
+    sharded = ShardedActuator(workers=1, setup=[f"{__name__}:die"])
+
+    async def source():
+        await asyncio.sleep(0.5)
+        yield Event("stamp", {"out": os.devnull})
+
+    sharded.bind_generator(source())
+    asyncio.run(asyncio.wait_for(sharded.main_loop(), timeout=30))
+    assert sharded.worker_stats == [{}]
+
+
+def test_similar_keys_are_spread_across_shards():
+    for workers in (4, 8):
+        sharded = ShardedActuator(workers=workers)
+        counts = Counter(sharded.shard_of(Event("log_write", {"path": f"log_{i}.log"})) for i in range(1024))
+        mean = 1024 / workers
+        assert len(counts) == workers
+        assert all(0.75 * mean <= count <= 1.25 * mean for count in counts.values())
+
+    # 基准测试使用的16个文件在4个进程上全部被使用
+    sharded = ShardedActuator(workers=4)
+    assert len({sharded.shard_of(Event("log_write", {"path": f"log_{i}.log"})) for i in range(16)}) == 4
+
+
+def _log_script(paths, close_data):
+    events = [Event("log_open", {"path": path}) for path in paths]
+    events += [Event("log_write", {"path": path, "content": f"line {i}"}) for i in range(100) for path in paths]
+    if close_data is not None:
+        events.append(Event("log_close", close_data))
+    events.append(Event("exit", None))
+    return events
+
+
+def test_workers_close_their_logs_and_keyless_close_is_broadcast(tmp_path):
+    for close_data, marker in (({"end_marker": "bye"}, "end:'bye'"), (None, "end:'0'")):
+        paths = [str(tmp_path / f"{marker[5:-1]}_{i}.log") for i in range(4)]
+        sharded = ShardedActuator(workers=4, setup=["EventActuator.commands.LoggerInstructionLibrary:register_commands"])
+
+        async def source():
+            for event in _log_script(paths, close_data):
+                yield event
+
+        sharded.bind_generator(source())
+        asyncio.run(asyncio.wait_for(sharded.main_loop(), timeout=60))
+        # 不带path的log_close发送给所有进程；没有log_close时各进程结束前自行关闭
+        assert sum(sharded.sent) == 4 + 400 + (4 if close_data is not None else 0)
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            assert [line for line in lines if line.startswith("line ")] == [f"line {i}" for i in range(100)]
+            assert lines[-1] == marker